@@ -16,13 +16,23 @@
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
+import dash_table
 import plotly.graph_objects as go
-from flask import request
+import plotly.io as pio
+from flask import request, g, has_request_context
 import re
 import pandas as pd
+import pytz
 import datetime
+import hashlib
+import logging
+import os
+import cached_dash  # Local file: cached_dash.py
 import color  # Local file: color.py
 import covid_data  # Local file: covid_data.py
+import forecast  # Local file: forecast.py
+import response_cache  # Local file: response_cache.py
+import snapshot  # Local file: snapshot.py
 
 
 ##### 1) Instantiate Objects for RGB Colors Used In Interface ----------------------------------------------------------
@@ -49,29 +59,90 @@ TRANSPARENT = color.Color(0, 0, 0, 0)
 # Load Google Analytics on page load
 external_scripts = ['https://www.googletagmanager.com/gtag/js?id=UA-174296614-1']
 
+# Responses to button clicks are cached in memory for each worker process, or in a directory shared by all the worker
+# processes on the same machine if CALLBACK_CACHE_DIR is set. Responses are saved by layout version (see layout_version()
+# below), so worker processes share them once they have retrieved the same data. Separate machines (e.g. Heroku dynos)
+# each have their own directory, and don't share responses.
+if os.environ.get('CALLBACK_CACHE_DIR'):
+    callback_cache = response_cache.FileSystemCache(os.environ['CALLBACK_CACHE_DIR'])
+else:
+    callback_cache = response_cache.LRUCache()
+
 # Initalize the Dash app and provide webpage title
-app = dash.Dash(__name__, external_scripts=external_scripts)
+# Note: Until the data has been retrieved, the layout is a page saying the data is loading, which doesn't contain the
+# graph and buttons used by the callbacks below, so Dash is told not to check the callbacks against the layout
+app = cached_dash.CachedDash(__name__, external_scripts=external_scripts, callback_cache=callback_cache,
+                             suppress_callback_exceptions=True)
 server = app.server
 app.title = 'COVID-19 EduTrack @ CofC'
 
 # Determine whether the user is viewing the webpage on a mobile device
-is_mobile = None
+# Note: The answer is stored on flask.g, which belongs to the current request, instead of a global variable. With
+# threaded workers, one worker handles many requests at once, so a global variable would let one user's
+# device change the webpage sent to another user.
+mobile_string = '(?i)android|fennec|iemobile|iphone|opera (?:mini|mobi)|mobile'
+re_mobile = re.compile(mobile_string)
 @server.before_request
 def before_request():
-    agent = request.headers.get('User_Agent')
-    mobile_string = '(?i)android|fennec|iemobile|iphone|opera (?:mini|mobi)|mobile'
-    re_mobile = re.compile(mobile_string)
-    global is_mobile
-    is_mobile = len(re_mobile.findall(agent)) > 0
+    agent = request.headers.get('User_Agent', '')
+    g.is_mobile = len(re_mobile.findall(agent)) > 0
+
+def is_mobile():
+    return has_request_context() and g.get('is_mobile', False)
 
 
 
 ##### 3) Collect and format current COVID-19 data for Charleston County, South Carolina, etc. --------------------------
 
+# Show the summary of corrections made to each dataset (see data_quality.py) and any errors retrieving data in the logs
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+# The datasets are read from their original URLs, unless COVID_DATA_SOURCE is set to a local directory of CSV files or a
+# local SQLite database (see the data sources in covid_data.py)
+data_source = covid_data.open_source(os.environ.get('COVID_DATA_SOURCE'))
+
+# Project the number of new cases or deaths per day for a state and every county in it, fitting all of them at once
+def forecast_state_and_counties(state_data, variable):
+    table = state_data.get_county_table(variable, state_data.state)
+    table[state_data.state] = state_data.get_daily_cases() if variable == 'cases' else state_data.get_daily_deaths()
+    return forecast.forecast_log_linear(table)
+
 # Create objects to retrieve and manipulate data by geographic location
-south_carolina = covid_data.StateData('South Carolina')
-charleston_county = covid_data.CountyData('Charleston', 'South Carolina')
-#downtown_charleston = covid_data.ZIPCodeGroupData([29401, 29424, 29425, 29403, 29409])
+def load_data():
+    south_carolina = covid_data.StateData('South Carolina', data_source)
+    return {
+        'south_carolina': south_carolina,
+        'charleston_county': covid_data.CountyData('Charleston', 'South Carolina', data_source),
+        #'downtown_charleston': covid_data.ZIPCodeGroupData([29401, 29424, 29425, 29403, 29409], data_source),
+        'sc_county_rates': south_carolina.get_county_rates(),
+        'sc_forecasts': {
+            'cases': forecast_state_and_counties(south_carolina, 'cases'),
+            'deaths': forecast_state_and_counties(south_carolina, 'deaths'),
+        },
+    }
+
+# Identify each snapshot by the data in it (the date of the latest data and a hash of the daily numbers everything else
+# is computed from), so every worker process that retrieves the same data has the same snapshot version
+def get_data_version(data):
+    south_carolina = data['south_carolina']
+    charleston_county = data['charleston_county']
+    daily = pd.concat([south_carolina.cases, south_carolina.deaths, charleston_county.cases, charleston_county.deaths],
+                      axis=1)
+    digest = hashlib.sha1(pd.util.hash_pandas_object(daily).values.tobytes()).hexdigest()
+    return '{:%Y%m%d}-{}'.format(daily.index[-1], digest[:12])
+
+# Serve the last-known-good data saved on disk right away, while fresh data is retrieved in the background. If the
+# fresh data can't be retrieved (e.g. GitHub is down), the webpage keeps serving the data it already has. If there is no
+# data saved on disk yet (e.g. on a new Heroku dyno, whose disk starts out empty), the webpage starts anyway and shows
+# that the data is loading until it arrives.
+data_store = snapshot.SnapshotStore(
+    loader=load_data,
+    path=os.environ.get('SNAPSHOT_PATH', 'snapshot.pickle'),
+    refresh_interval=datetime.timedelta(hours=float(os.environ.get('SNAPSHOT_REFRESH_HOURS', 12))),
+    data_format=4,
+    get_version=get_data_version
+)
+data_refresh_thread = data_store.start()
 
 # Read intervals.csv, which contains info about start and end dates of different semesters and class mode intervals
 # Class mode options are 'in-person', 'hybrid', and 'virtual'
@@ -150,328 +221,535 @@ for semester in class_mode_intervals['Semester'].unique():
 
 
 ##### 5) Draw figure and graph with selected COVID-19 data -------------------------------------------------------------
-
-# Build a bar graph object with the given data and color
-def create_bar_graph(x, y, units, location, color):
-    return go.Bar(
-        x=x,
-        y=y,
-        marker=dict(color=color.color_to_str(alpha=0.4), line_width=0),
-        hovertemplate=
-        '<span style="font-size: 20px; font-weight: 900; color: ' + color.__str__() + '">%{y:,}</span>' +
-        '<span style="font-size: 12px; font-weight: 500; color: ' + DARK_GRAY.__str__() + '"> ' + units + '</span>' +
-        '<span style="color: gray"><br>%{x}' +
-        '<br>' + location + '</span>' +
-        '<extra></extra>'
+# Note: Everything about the figure except the data (the layout, colors, and hover text for each location) is the same
+# for every graph, so it is built and checked by Plotly once, when the webpage starts. Each figure is then a plain
+# dictionary that reuses these pieces and only adds the data, instead of building and checking every Plotly object again.
+
+# The layout of the figure, without the date range and rangeslider (which depend on the data and the user's device)
+# Note: go.Figure() adds Plotly's default template to every figure, so it is added here once to keep the same look
+FIGURE_LAYOUT = go.Layout(
+    template=pio.templates.default,
+    margin=go.layout.Margin(l=50, r=50, b=20, t=50),
+    paper_bgcolor=TRANSPARENT.__str__(),
+    plot_bgcolor=TRANSPARENT.__str__(),
+    xaxis=dict(
+        ticks='outside',
+        tickcolor=WHITE.__str__(),
+        ticklen=5,
+        tickfont=dict(
+            color=DIM_GRAY.__str__()
+        ),
+        type='date'
+    ),
+    yaxis=dict(
+        ticks='outside',
+        tickcolor=WHITE.__str__(),
+        ticklen=5,
+        tickfont=dict(
+            color=DIM_GRAY.__str__()
+        ),
+        rangemode='nonnegative',
+    ),
+    hoverlabel=dict(
+        bgcolor=WHITE.__str__(),
+        bordercolor=OFF_WHITE.__str__(),
+        font_size=10,
+        font_family='Open Sans',
+        font_color=BLACK.__str__()
+    ),
+    autosize=True,
+    dragmode=False,
+    font_family='Open Sans',
+    font_color=DIM_GRAY.__str__(),
+    spikedistance=1000,
+    hovermode='x',
+    shapes=class_mode_shapes + semester_shapes,
+    annotations=class_mode_labels + semester_labels,
+    showlegend=False,
+    transition_duration=1000,
+    transition_easing='exp-in-out',
+).to_plotly_json()
+
+# Build the style (everything except the data) of each graph drawn for a location and units (cases or deaths)
+def create_trace_styles(location, units, color):
+    return dict(
+        # Bar graph of the number per day
+        bar=go.Bar(
+            marker=dict(color=color.color_to_str(alpha=0.4), line_width=0),
+            hovertemplate=
+            '<span style="font-size: 20px; font-weight: 900; color: ' + color.__str__() + '">%{y:,}</span>' +
+            '<span style="font-size: 12px; font-weight: 500; color: ' + DARK_GRAY.__str__() + '"> ' + units + '</span>' +
+            '<span style="color: gray"><br>%{x}' +
+            '<br>' + location + '</span>' +
+            '<extra></extra>'
+        ).to_plotly_json(),
+
+        # Line graph of the 7-day moving average
+        line=go.Scatter(
+            line=dict(color=color.__str__(), width=2),
+            hoverinfo='none'
+        ).to_plotly_json(),
+
+        # Upper and lower edges of the projection's confidence band
+        # Note: The upper edge is drawn first, so that the lower edge can fill the space up to it ('tonexty')
+        band_upper=go.Scatter(
+            line=dict(width=0),
+            hoverinfo='none'
+        ).to_plotly_json(),
+        band_lower=go.Scatter(
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor=color.color_to_str(alpha=0.15),
+            hoverinfo='none'
+        ).to_plotly_json(),
+
+        # Dashed line graph of the projection
+        projection=go.Scatter(
+            line=dict(color=color.__str__(), width=2, dash='dash'),
+            hovertemplate=
+            '<span style="font-size: 20px; font-weight: 900; color: ' + color.__str__() + '">%{y:,.0f}</span>' +
+            '<span style="font-size: 12px; font-weight: 500; color: ' + DARK_GRAY.__str__() + '"> ' + units +
+            ' (projected)</span>' +
+            '<span style="color: gray"><br>%{x}' +
+            '<br>' + location + '</span>' +
+            '<extra></extra>'
+        ).to_plotly_json(),
     )
 
-# Build a line graph object with the given data and color
-def create_line_graph(x, y, color):
-    return go.Scatter(
-        x=x,
-        y=y,
-        line=dict(color=color.__str__(), width=2),
-        hoverinfo='none'
-    )
+TRACE_STYLES = {
+    #('Downtown Charleston', 'cases'): create_trace_styles('Downtown Charleston', 'cases', TEAL),
+    ('Charleston County', 'cases'): create_trace_styles('Charleston County', 'cases', BLUE_GREEN),
+    ('Charleston County', 'deaths'): create_trace_styles('Charleston County', 'deaths', BLUE_GREEN),
+    ('South Carolina', 'cases'): create_trace_styles('South Carolina', 'cases', DARK_BLUE),
+    ('South Carolina', 'deaths'): create_trace_styles('South Carolina', 'deaths', DARK_BLUE),
+}
+
+# Build a bar graph with the given data and style
+def create_bar_graph(x, y, style):
+    return dict(style['bar'], x=x, y=y)
+
+# Build a line graph with the given data and style
+def create_line_graph(x, y, style):
+    return dict(style['line'], x=x, y=y)
+
+# Build the graphs for a projection with the given style: a shaded confidence band and a dashed line for the projection
+def create_projection_graphs(projections, geography, style):
+    x = projections['projection'].index
+    return [
+        dict(style['band_upper'], x=x, y=projections['upper'][geography].values),
+        dict(style['band_lower'], x=x, y=projections['lower'][geography].values),
+        dict(style['projection'], x=x, y=projections['projection'][geography].values),
+    ]
 
 # Change settings for displaying the rangeslider based on the device viewing the webpage
 # The rangeslider does not work on mobile devices, so it is set to be not visible in that case
-def configure_rangeslider():
-    if not is_mobile:
+def configure_rangeslider(end_date):
+    if not is_mobile():
         return dict(
             visible=True,
             bgcolor=LIGHT_GRAY.color_to_str(alpha=0.2),
-            range=[datetime.datetime(2020, 1, 8), datetime.datetime(2022, 5, 2)]
+            range=[datetime.datetime(2020, 1, 8), end_date]
         )
     else:
         return dict(visible=False)
 
 # Each time a user clicks a button to show a different graph, this function draws the appropriate graph on the figure
 def generate_fig(show_downtown_cases=False, show_county_cases=False, show_county_deaths=False, show_sc_cases=False,
-                 show_sc_deaths=False):
-
-    # Create figure on which to draw graphs
-    fig = go.Figure(
-        layout=go.Layout(
-            margin=go.layout.Margin(l=50, r=50, b=20, t=50),
-            paper_bgcolor=TRANSPARENT.__str__(),
-            plot_bgcolor=TRANSPARENT.__str__(),
-            xaxis=dict(
-                ticks='outside',
-                tickcolor=WHITE.__str__(),
-                ticklen=5,
-                tickfont=dict(
-                    color=DIM_GRAY.__str__()
-                ),
-                rangeslider=configure_rangeslider(),
-                type='date',
-                range=[datetime.datetime(2022, 5, 3), datetime.datetime(2023, 5, 3)]
-            ),
-            yaxis=dict(
-                ticks='outside',
-                tickcolor=WHITE.__str__(),
-                ticklen=5,
-                tickfont=dict(
-                    color=DIM_GRAY.__str__()
-                ),
-                rangemode='nonnegative',
-            ),
-            hoverlabel=dict(
-                bgcolor=WHITE.__str__(),
-                bordercolor=OFF_WHITE.__str__(),
-                font_size=10,
-                font_family='Open Sans',
-                font_color=BLACK.__str__()
-            ),
-            autosize=True,
-            dragmode=False,
-            font_family='Open Sans',
-            font_color=DIM_GRAY.__str__(),
-            spikedistance=1000,
-            hovermode='x',
-            shapes=class_mode_shapes + semester_shapes,
-            annotations=class_mode_labels + semester_labels,
-            showlegend=False,
-            transition_duration=1000,
-            transition_easing='exp-in-out',
+                 show_sc_deaths=False, show_projection=False):
+
+    # Use the same snapshot for every graph on the figure, even if fresh data arrives part way through
+    data = data_store.get().data
+    south_carolina = data['south_carolina']
+    charleston_county = data['charleston_county']
+    #downtown_charleston = data['downtown_charleston']
+    sc_forecasts = data['sc_forecasts']
+
+    # Show the most recent year of data, with room after the latest date for the projection
+    end_date = sc_forecasts['cases']['projection'].index[-1].to_pydatetime()
+    start_date = end_date - datetime.timedelta(days=365)
+
+    # Create figure on which to draw graphs, reusing the layout and only setting the date range and rangeslider
+    # Note: FIGURE_LAYOUT is shared by every figure, so it is copied rather than changed
+    graphs = []
+    fig = dict(
+        data=graphs,
+        layout=dict(
+            FIGURE_LAYOUT,
+            xaxis=dict(FIGURE_LAYOUT['xaxis'], rangeslider=configure_rangeslider(end_date), range=[start_date, end_date])
         )
     )
 
     # # Draw a bar graph of daily cases and a line graph of 7-day moving average of daily cases for Downtown Charleston
     # if show_downtown_cases:
-    #     fig.add_trace(create_bar_graph(
+    #     style = TRACE_STYLES['Downtown Charleston', 'cases']
+    #     graphs.append(create_bar_graph(
     #         x=downtown_charleston.get_daily_cases().index,
-    #         y=downtown_charleston.get_daily_cases().clip(lower=0).values,
-    #         color=TEAL,
-    #         location='Downtown Charleston',
-    #         units='cases'
+    #         y=downtown_charleston.get_daily_cases().values,
+    #         style=style
     #     ))
     #
-    #     fig.add_trace(create_line_graph(
+    #     graphs.append(create_line_graph(
     #         x=downtown_charleston.get_daily_cases_moving_avg(days=7).index,
     #         y=downtown_charleston.get_daily_cases_moving_avg(days=7).values,
-    #         color=TEAL,
+    #         style=style
     #     ))
 
     # Draw a bar graph of daily cases and a line graph of 7-day moving average of daily cases for Charleston County
     if show_county_cases:
-        fig.add_trace(create_bar_graph(
+        style = TRACE_STYLES['Charleston County', 'cases']
+        graphs.append(create_bar_graph(
             x=charleston_county.get_daily_cases().index,
-            y=charleston_county.get_daily_cases().clip(lower=0).values,
-            color=BLUE_GREEN,
-            location='Charleston County',
-            units='cases'
+            y=charleston_county.get_daily_cases().values,
+            style=style
         ))
 
-        fig.add_trace(create_line_graph(
+        graphs.append(create_line_graph(
             x=charleston_county.get_daily_cases_moving_avg(days=7).index,
             y=charleston_county.get_daily_cases_moving_avg(days=7).values,
-            color=BLUE_GREEN,
+            style=style
         ))
 
+        if show_projection:
+            graphs.extend(create_projection_graphs(sc_forecasts['cases'], 'Charleston', style))
+
     # Draw a bar graph of daily deaths and a line graph of 7-day moving average of daily deaths for Charleston County
     if show_county_deaths:
-        fig.add_trace(create_bar_graph(
+        style = TRACE_STYLES['Charleston County', 'deaths']
+        graphs.append(create_bar_graph(
             x=charleston_county.get_daily_deaths().index,
-            y=charleston_county.get_daily_deaths().clip(lower=0).values,
-            color=BLUE_GREEN,
-            location='Charleston County',
-            units='deaths'
+            y=charleston_county.get_daily_deaths().values,
+            style=style
         ))
 
-        fig.add_trace(create_line_graph(
+        graphs.append(create_line_graph(
             x=charleston_county.get_daily_deaths_moving_avg(days=7).index,
             y=charleston_county.get_daily_deaths_moving_avg(days=7).values,
-            color=BLUE_GREEN
+            style=style
         ))
 
+        if show_projection:
+            graphs.extend(create_projection_graphs(sc_forecasts['deaths'], 'Charleston', style))
+
     # Draw a bar graph of daily cases and a line graph of 7-day moving average of daily cases for South Carolina
     if show_sc_cases:
-        fig.add_trace(create_bar_graph(
+        style = TRACE_STYLES['South Carolina', 'cases']
+        graphs.append(create_bar_graph(
             x=south_carolina.get_daily_cases().index,
-            y=south_carolina.get_daily_cases().clip(lower=0).values,
-            color=DARK_BLUE,
-            location='South Carolina',
-            units='cases'
+            y=south_carolina.get_daily_cases().values,
+            style=style
         ))
 
-        fig.add_trace(create_line_graph(
+        graphs.append(create_line_graph(
             x=south_carolina.get_daily_cases_moving_avg(days=7).index,
             y=south_carolina.get_daily_cases_moving_avg(days=7).values,
-            color=DARK_BLUE
+            style=style
         ))
 
+        if show_projection:
+            graphs.extend(create_projection_graphs(sc_forecasts['cases'], 'South Carolina', style))
+
     # Draw a bar graph of daily deaths and a line graph of 7-day moving average of daily deaths for South Carolina
     if show_sc_deaths:
-        fig.add_trace(create_bar_graph(
+        style = TRACE_STYLES['South Carolina', 'deaths']
+        graphs.append(create_bar_graph(
             x=south_carolina.get_daily_deaths().index,
-            y=south_carolina.get_daily_deaths().clip(lower=0).values,
-            color=DARK_BLUE,
-            location='South Carolina',
-            units='deaths'
+            y=south_carolina.get_daily_deaths().values,
+            style=style
         ))
 
-        fig.add_trace(create_line_graph(
+        graphs.append(create_line_graph(
             x=south_carolina.get_daily_deaths_moving_avg(days=7).index,
             y=south_carolina.get_daily_deaths_moving_avg(days=7).values,
-            color=DARK_BLUE
+            style=style
         ))
 
-    return fig
-
-
+        if show_projection:
+            graphs.extend(create_projection_graphs(sc_forecasts['deaths'], 'South Carolina', style))
 
-##### 6) Create an HTML layout for graph, numbers, and buttons to change the graph -------------------------------------
-
-app.layout = html.Div([
+    return fig
 
-    # Allow webpage to scale based on screen size
-    html.Meta(
-        name='viewport',
-        content='width=device-width, initial-scale=1.0'
-    ),
+# Build a sortable table of the current 7-day average of new cases per day for every county in South Carolina. The rates
+# are computed once per snapshot for all counties at once, so only this small table is sent to the webpage. Each row is
+# shaded by the county's rate per 100,000 residents, darker for counties in a higher quarter of the state.
+def create_county_table(county_rates):
+    rows = county_rates.assign(
+        average=county_rates['average'].round(1),
+        rate=county_rates['rate'].round(1),
+        growth=(county_rates['growth'] * 100).round(0)
+    )
+    quartiles = rows['rate'].quantile([0.25, 0.5, 0.75]).tolist()
+    heat_queries = [
+        '{{rate}} < {}'.format(quartiles[0]),
+        '{{rate}} >= {} && {{rate}} < {}'.format(quartiles[0], quartiles[1]),
+        '{{rate}} >= {} && {{rate}} < {}'.format(quartiles[1], quartiles[2]),
+        '{{rate}} >= {}'.format(quartiles[2]),
+    ]
+    heat_styles = []
+    for i, heat_query in enumerate(heat_queries):
+        heat_styles.append({
+            'if': {'filter_query': heat_query, 'column_id': 'rate'},
+            'backgroundColor': DARK_BLUE.color_to_str(alpha=round(0.15 + 0.2 * i, 2)),
+            'color': WHITE.__str__() if i >= 2 else DIM_GRAY.__str__()
+        })
+
+    return dash_table.DataTable(
+        id='county-table',
+        columns=[
+            {'name': 'County', 'id': 'county'},
+            {'name': 'Daily Cases (7-Day Avg.)', 'id': 'average', 'type': 'numeric'},
+            {'name': 'Per 100,000 Residents', 'id': 'rate', 'type': 'numeric'},
+            {'name': 'Change From Last Week (%)', 'id': 'growth', 'type': 'numeric'},
+        ],
+        data=rows.to_dict('records'),
+        sort_action='native',
+        style_as_list_view=True,
+        style_table={'overflowY': 'auto', 'maxHeight': '400px'},
+        style_header={'fontWeight': 700, 'backgroundColor': OFF_WHITE.__str__(), 'color': DIM_GRAY.__str__()},
+        style_cell={'fontFamily': 'Open Sans', 'fontSize': 12, 'padding': '5px 10px', 'color': DIM_GRAY.__str__()},
+        style_cell_conditional=[{'if': {'column_id': 'county'}, 'textAlign': 'left'}],
+        style_data_conditional=heat_styles
+    )
 
-    # Provide Open Sans font
-    html.Link(
-        href='https://fonts.googleapis.com/css2?family=Open+Sans:wght@300;400;600;700;800&display=swap',
-        rel='stylesheet'
-    ),
 
-    # Header bar containing logo
-    html.Div([
-        html.Img(src='assets/horizontal_logo_for_light_background.png', id='logo'),
-        html.P('at College of Charleston', id='title')
-    ], id='header'),
 
-    # Body of webpage
-    html.Div([
+##### 6) Create an HTML layout for graph, numbers, and buttons to change the graph -------------------------------------
 
-        # Container for graph portion of webpage
+# Describe when the data being shown was retrieved, and whether the most recent attempt to update it failed. The time is
+# shown in Charleston's time zone, since the server's clock (e.g. on Heroku) is usually in UTC. Snapshots saved by older
+# code have no time zone, so astimezone() treats them as the server's local time, which is the time they were saved in.
+CHARLESTON_TIME_ZONE = pytz.timezone('America/New_York')
+
+def describe_data_age(current_snapshot):
+    created = current_snapshot.created.astimezone(CHARLESTON_TIME_ZONE)
+    description = 'Data updated {:%b %d, %Y at %I:%M %p %Z}'.format(created)
+    if data_store.is_stale():
+        description += ' (latest update failed, showing last saved data)'
+    return description
+
+# Until the data has been retrieved, show a page saying the data is loading, which reloads itself once the data arrives
+def serve_loading_layout():
+    return html.Div([
+        html.Meta(
+            name='viewport',
+            content='width=device-width, initial-scale=1.0'
+        ),
+        html.Link(
+            href='https://fonts.googleapis.com/css2?family=Open+Sans:wght@300;400;600;700;800&display=swap',
+            rel='stylesheet'
+        ),
+        html.Div([
+            html.Img(src='assets/horizontal_logo_for_light_background.png', id='logo'),
+            html.P('at College of Charleston', id='title')
+        ], id='header'),
         html.Div([
-            html.H2(id='graph-title', className='card-title'),
-            dcc.Graph(
-                id='graph',
-                figure=generate_fig(),
-                config={
-                    'displayModeBar': False,
-                    'showTips': False,
-                    'responsive': True,
-                    'autosizable': True,
-                    'doubleClick': not is_mobile,
-                }
-            )
-        ], id='graph-container', className='dashboard-card'),
-
-        # Container for column of 'cards' shown to right of graph (or below graph on smaller screens)
+            html.H2('Loading the Latest COVID-19 Data', id='loading-title', className='card-title'),
+            html.P('This page will update by itself in a moment.', id='loading-message')
+        ], id='loading-container', className='dashboard-card'),
+
+        # Check every few seconds whether the data has arrived, and reload the page when it has
+        dcc.Interval(id='loading-interval', interval=5000),
+        dcc.Location(id='loading-location', refresh=True)
+    ])
+
+# The layout is built from the current snapshot, so the numbers shown are updated whenever the data is refreshed
+def serve_layout():
+    current_snapshot = data_store.get()
+    if current_snapshot is None:
+        return serve_loading_layout()
+    south_carolina = current_snapshot.data['south_carolina']
+    charleston_county = current_snapshot.data['charleston_county']
+    #downtown_charleston = current_snapshot.data['downtown_charleston']
+    return html.Div([
+
+        # Allow webpage to scale based on screen size
+        html.Meta(
+            name='viewport',
+            content='width=device-width, initial-scale=1.0'
+        ),
+
+        # Provide Open Sans font
+        html.Link(
+            href='https://fonts.googleapis.com/css2?family=Open+Sans:wght@300;400;600;700;800&display=swap',
+            rel='stylesheet'
+        ),
+
+        # Header bar containing logo
         html.Div([
+            html.Img(src='assets/horizontal_logo_for_light_background.png', id='logo'),
+            html.P('at College of Charleston', id='title')
+        ], id='header'),
 
-            # Card containing numbers and buttons for viewing data in Charleston County
-            html.Div([
-                html.H2('Charleston County', id='county-title', className='card-title'),
-                html.Div([
-                    html.P('{:,}'.format(charleston_county.get_total_cases()), className='number'),
-                    html.P('Confirmed Cases', className='label'),
-                    html.Button('Show Graph', className='toggle-graph-button', id='show-chs-cases')
-                ], className='card-half'),
-                html.Div([
-                    html.P('{:,}'.format(charleston_county.get_total_deaths()), className='number'),
-                    html.P('Reported Deaths', className='label'),
-                    html.Button('Show Graph', className='toggle-graph-button', id='show-chs-deaths')
-                ], className='card-half')
-            ], className='dashboard-card sidebar-card remove-top-margin'),
+        # Body of webpage
+        html.Div([
 
-            # Cards containing numbers and buttons for viewing data in South Carolina
+            # Container for graph portion of webpage
+            html.Div([
+                html.H2(id='graph-title', className='card-title'),
+                dcc.Checklist(
+                    id='show-projection',
+                    options=[{'label': 'Show 14-Day Projection', 'value': 'projection'}],
+                    value=[]
+                ),
+                dcc.Graph(
+                    id='graph',
+                    figure=generate_fig(),
+                    config={
+                        'displayModeBar': False,
+                        'showTips': False,
+                        'responsive': True,
+                        'autosizable': True,
+                        'doubleClick': not is_mobile(),
+                    }
+                )
+            ], id='graph-container', className='dashboard-card'),
+
+            # Container for column of 'cards' shown to right of graph (or below graph on smaller screens)
             html.Div([
-                html.H2('South Carolina', id='sc-title', className='card-title'),
-                html.Div([
-                    html.P('{:,}'.format(south_carolina.get_total_cases()), className='number'),
-                    html.P('Confirmed Cases', className='label'),
-                    html.Button('Show Graph', className='toggle-graph-button', id='show-sc-cases')
-                ], className='card-half'),
-                html.Div([
-                    html.P('{:,}'.format(south_carolina.get_total_deaths()), className='number'),
-                    html.P('Reported Deaths', className='label'),
-                    html.Button('Show Graph', className='toggle-graph-button', id='show-sc-deaths')
-                ], className='card-half'),
-            ], className='dashboard-card sidebar-card'),
-
-            # # Card containing numbers and buttons for viewing data in Downtown Charleston
-            # html.Div([
-            #     html.H2('Downtown Charleston', id='downtown-title', className='card-title'),
-            #     html.Div([
-            #         html.P('{:,}'.format(downtown_charleston.get_total_cases()), className='number'),
-            #         html.P('Cases', className='label'),
-            #         html.Button('Show Graph', className='toggle-graph-button', id='show-downtown-cases')
-            #     ], className='card-full'),
-            # ], className='dashboard-card sidebar-card'),
-
-            # Button linked to CofC's Back on the Bricks plan
-            html.A([
-                html.Div([
-                    html.P('CofC Back on the Bricks Plan', className='link-card-text')
-                ], className='dashboard-card sidebar-card link-card')
-            ], href='https://cofc.edu/back-on-the-bricks/', target='_blank', className='no-underline'),
 
-            # Button linked to COVID-19 information from SC DHEC
-            html.A([
+                # Card containing numbers and buttons for viewing data in Charleston County
                 html.Div([
-                    html.P('SC DHEC COVID-19 Information', className='link-card-text')
-                ], className='dashboard-card sidebar-card link-card remove-bottom-margin')
-            ], href='https://www.scdhec.gov/infectious-diseases/viruses/coronavirus-disease-2019-covid-19',
-            target='_blank', className='no-underline'),
-
-        ], id='sidebar')
-
-    ], id='body'),
-
-    # Footer bar at bottom of webpage, containing links to 'About the Developer' and 'Disclaimer & Privacy Policy'
-    html.Div([
-        html.P('About the Developer', className='footer-items left-footer', id='open-about'),
-        html.P('Disclaimer & Privacy Policy', className='footer-items right-footer', id='open-disclaimer')
-    ], id='footer'),
+                    html.H2('Charleston County', id='county-title', className='card-title'),
+                    html.Div([
+                        html.P('{:,}'.format(charleston_county.get_total_cases()), className='number'),
+                        html.P('Confirmed Cases', className='label'),
+                        html.Button('Show Graph', className='toggle-graph-button', id='show-chs-cases')
+                    ], className='card-half'),
+                    html.Div([
+                        html.P('{:,}'.format(charleston_county.get_total_deaths()), className='number'),
+                        html.P('Reported Deaths', className='label'),
+                        html.Button('Show Graph', className='toggle-graph-button', id='show-chs-deaths')
+                    ], className='card-half')
+                ], className='dashboard-card sidebar-card remove-top-margin'),
+
+                # Cards containing numbers and buttons for viewing data in South Carolina
+                html.Div([
+                    html.H2('South Carolina', id='sc-title', className='card-title'),
+                    html.Div([
+                        html.P('{:,}'.format(south_carolina.get_total_cases()), className='number'),
+                        html.P('Confirmed Cases', className='label'),
+                        html.Button('Show Graph', className='toggle-graph-button', id='show-sc-cases')
+                    ], className='card-half'),
+                    html.Div([
+                        html.P('{:,}'.format(south_carolina.get_total_deaths()), className='number'),
+                        html.P('Reported Deaths', className='label'),
+                        html.Button('Show Graph', className='toggle-graph-button', id='show-sc-deaths')
+                    ], className='card-half'),
+                ], className='dashboard-card sidebar-card'),
+
+                # # Card containing numbers and buttons for viewing data in Downtown Charleston
+                # html.Div([
+                #     html.H2('Downtown Charleston', id='downtown-title', className='card-title'),
+                #     html.Div([
+                #         html.P('{:,}'.format(downtown_charleston.get_total_cases()), className='number'),
+                #         html.P('Cases', className='label'),
+                #         html.Button('Show Graph', className='toggle-graph-button', id='show-downtown-cases')
+                #     ], className='card-full'),
+                # ], className='dashboard-card sidebar-card'),
+
+                # Button linked to CofC's Back on the Bricks plan
+                html.A([
+                    html.Div([
+                        html.P('CofC Back on the Bricks Plan', className='link-card-text')
+                    ], className='dashboard-card sidebar-card link-card')
+                ], href='https://cofc.edu/back-on-the-bricks/', target='_blank', className='no-underline'),
+
+                # Button linked to COVID-19 information from SC DHEC
+                html.A([
+                    html.Div([
+                        html.P('SC DHEC COVID-19 Information', className='link-card-text')
+                    ], className='dashboard-card sidebar-card link-card remove-bottom-margin')
+                ], href='https://www.scdhec.gov/infectious-diseases/viruses/coronavirus-disease-2019-covid-19',
+                target='_blank', className='no-underline'),
+
+            ], id='sidebar')
+
+        ], id='body'),
+
+        # Card containing the table of current rates for every county in South Carolina
+        html.Div([
+            html.H2('South Carolina Counties: Current Daily Cases', id='counties-title', className='card-title'),
+            create_county_table(current_snapshot.data['sc_county_rates'])
+        ], id='county-table-container', className='dashboard-card'),
 
-    # Show this popup box when user clicks on 'About the Developer' in the footer bar
-    html.Div([
+        # Footer bar at bottom of webpage, containing links to 'About the Developer' and 'Disclaimer & Privacy Policy', along
+        # with how old the data being shown is
         html.Div([
-            html.H2('About the Developer', className='popup-title'),
-            html.P('×', className='popup-close', id='close-about')
-        ], className='popup-heading'),
-        html.P([
-            'This dashboard was developed by Connor Cozad, an undergraduate studying data science at the College of Charleston. Feel free to reach out via ',
-            html.A('LinkedIn', href='https://www.linkedin.com/in/connor-cozad', target='_blank'),
-            ' or by email at 23ccozad@gmail.com.',
-            html.Br(),
-            html.Br(),
-            'Copyright © 2020 Connor Cozad'
-        ],
-        className='popup-body')
-    ], id='popup-left', className='popup-box', style={'display': 'none'}),
+            html.P('About the Developer', className='footer-items left-footer', id='open-about'),
+            html.P('Disclaimer & Privacy Policy', className='footer-items right-footer', id='open-disclaimer'),
+            html.P(describe_data_age(current_snapshot), className='footer-items', id='data-age')
+        ], id='footer'),
 
-    # Show this popup box when user clicks on 'Disclaimer & Privacy Policy' in the footer bar
-    html.Div([
+        # Show this popup box when user clicks on 'About the Developer' in the footer bar
         html.Div([
-            html.H2('Disclaimer & Privacy Policy', className='popup-title'),
-            html.P('×', className='popup-close', id='close-disclaimer')
-        ], className='popup-heading'),
-        html.P([
-            'This webpage is not affiliated with the College of Charleston (CofC), the City of Charleston, Charleston County, the State of South Carolina, or the South Carolina Department of Health and Environmental Control. Links to external websites do not indicate an affiliation.',
-            html.Br(), html.Br(),
-            'Data presented on this webpage is provided by ',
-            html.A('JHU CSSE COVID-19 Data', href='https://github.com/CSSEGISandData/COVID-19', target='_blank'),
-            ' and ',
-            html.A('SC DHEC COVID-19 Open Data', href='https://scdhec-covid-19-open-data-sc-dhec.hub.arcgis.com/', target='_blank'),
-            '. The developer of this webpage is not liable nor responsible for the accuracy of this data, nor any decisions made based on the presentation of this data.',
-            html.Br(), html.Br(),
-            'This website uses Google Analytics scripts and cookies to collect information about users and how they interact with this website. This information includes the user’s IP address. The collected information allows the developer to make improvements to this website. The developer does not share this information with third parties. Users may click the following link to learn more about ',
-            html.A('Google Analytics Terms of Service.', href='https://marketingplatform.google.com/about/analytics/terms/us/', target='_blank'),
-            ' Users may use this browser tool to choose to ',
-            html.A('opt-out of Google Analytics.', href='https://tools.google.com/dlpage/gaoptout?hl=en', target='_blank'),
-            ' Users may also use the instructions at the following link to ',
-            html.A('disable cookies in their browser', href='https://www.avast.com/c-enable-disable-cookies', target='_blank'),
-            '. For more information about the privacy policy, contact the developer by email at 23ccozad@gmail.com.'
-        ], className='popup-body'),
-    ], id='popup-right', className='popup-box', style={'display': 'none'})
-])
+            html.Div([
+                html.H2('About the Developer', className='popup-title'),
+                html.P('×', className='popup-close', id='close-about')
+            ], className='popup-heading'),
+            html.P([
+                'This dashboard was developed by Connor Cozad, an undergraduate studying data science at the College of Charleston. Feel free to reach out via ',
+                html.A('LinkedIn', href='https://www.linkedin.com/in/connor-cozad', target='_blank'),
+                ' or by email at 23ccozad@gmail.com.',
+                html.Br(),
+                html.Br(),
+                'Copyright © 2020 Connor Cozad'
+            ],
+            className='popup-body')
+        ], id='popup-left', className='popup-box', style={'display': 'none'}),
+
+        # Show this popup box when user clicks on 'Disclaimer & Privacy Policy' in the footer bar
+        html.Div([
+            html.Div([
+                html.H2('Disclaimer & Privacy Policy', className='popup-title'),
+                html.P('×', className='popup-close', id='close-disclaimer')
+            ], className='popup-heading'),
+            html.P([
+                'This webpage is not affiliated with the College of Charleston (CofC), the City of Charleston, Charleston County, the State of South Carolina, or the South Carolina Department of Health and Environmental Control. Links to external websites do not indicate an affiliation.',
+                html.Br(), html.Br(),
+                'Data presented on this webpage is provided by ',
+                html.A('JHU CSSE COVID-19 Data', href='https://github.com/CSSEGISandData/COVID-19', target='_blank'),
+                ' and ',
+                html.A('SC DHEC COVID-19 Open Data', href='https://scdhec-covid-19-open-data-sc-dhec.hub.arcgis.com/', target='_blank'),
+                '. The developer of this webpage is not liable nor responsible for the accuracy of this data, nor any decisions made based on the presentation of this data.',
+                html.Br(), html.Br(),
+                'This website uses Google Analytics scripts and cookies to collect information about users and how they interact with this website. This information includes the user’s IP address. The collected information allows the developer to make improvements to this website. The developer does not share this information with third parties. Users may click the following link to learn more about ',
+                html.A('Google Analytics Terms of Service.', href='https://marketingplatform.google.com/about/analytics/terms/us/', target='_blank'),
+                ' Users may use this browser tool to choose to ',
+                html.A('opt-out of Google Analytics.', href='https://tools.google.com/dlpage/gaoptout?hl=en', target='_blank'),
+                ' Users may also use the instructions at the following link to ',
+                html.A('disable cookies in their browser', href='https://www.avast.com/c-enable-disable-cookies', target='_blank'),
+                '. For more information about the privacy policy, contact the developer by email at 23ccozad@gmail.com.'
+            ], className='popup-body'),
+        ], id='popup-right', className='popup-box', style={'display': 'none'})
+    ])
+
+# Identify this version of the code and assets, so layouts and responses cached by an older version of the webpage (e.g.
+# by browsers, or in CALLBACK_CACHE_DIR) aren't reused after it is updated with the same data
+def get_code_version():
+    digest = hashlib.sha1()
+    app_directory = os.path.dirname(os.path.abspath(__file__))
+    for directory in [app_directory, os.path.join(app_directory, 'assets')]:
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(('.py', '.css', '.js', '.csv')):
+                with open(os.path.join(directory, name), 'rb') as file:
+                    digest.update(file.read())
+    return digest.hexdigest()[:8]
+
+code_version = get_code_version()
+
+# The layout only changes when there is a new snapshot, so it is built and serialized once per snapshot (and device
+# class) instead of on every page view. The snapshot version comes from the data itself, so every worker process with
+# the same data has the same layout version, and shares callback responses saved in CALLBACK_CACHE_DIR.
+def layout_version():
+    current_snapshot = data_store.get()
+    return '{}-{}-{}-{}'.format(
+        code_version,
+        current_snapshot.version if current_snapshot is not None else 'loading',
+        'stale' if data_store.is_stale() else 'fresh',
+        'mobile' if is_mobile() else 'desktop'
+    )
+
+app.layout = serve_layout
+app.layout_version = layout_version
 
 
 
@@ -479,7 +757,10 @@ app.layout = html.Div([
 
 # The on_click() function is called anytime one of the HTML elements in the input list is clicked
 # All of the HTML elements in the output list are assigned new values based on which input was triggered
-@app.callback(
+# Note: The callbacks below only depend on which button was clicked (not how many times), so they are registered with
+# cached_callback() and each response is only computed once per snapshot and device class. The graph also depends on
+# whether the projection is shown and which graph is already selected, so those values are listed in vary_on.
+@app.cached_callback(
     [
         dash.dependencies.Output('graph', 'figure'),
         dash.dependencies.Output('graph-title', 'children'),
@@ -495,11 +776,29 @@ app.layout = html.Div([
         dash.dependencies.Input('show-sc-cases', 'n_clicks'),
         dash.dependencies.Input('show-chs-deaths', 'n_clicks'),
         dash.dependencies.Input('show-chs-cases', 'n_clicks'),
+        dash.dependencies.Input('show-projection', 'value'),
+    ], [
+        dash.dependencies.State('show-sc-deaths', 'className'),
+        dash.dependencies.State('show-sc-cases', 'className'),
+        dash.dependencies.State('show-chs-deaths', 'className'),
+        dash.dependencies.State('show-chs-cases', 'className'),
+    ],
+    vary_on=[
+        'show-projection.value',
+        'show-sc-deaths.className',
+        'show-sc-cases.className',
+        'show-chs-deaths.className',
+        'show-chs-cases.className',
     ]
 )
 
 # This function is called whenever one of the above input objects is triggered by a mouse click
-def on_click(btn1, btn2, btn3, btn4):
+def on_click(btn1, btn2, btn3, btn4, projection, class1, class2, class3, class4):
+
+    # Each worker process retrieves its own data, so this one may still be loading even though the page was already
+    # shown by another one. There is nothing to draw yet, so the graph is left as it is.
+    if data_store.is_loading():
+        raise dash.exceptions.PreventUpdate
 
     # Determine the ID of the button that was clicked
     changed_id = [p['prop_id'] for p in dash.callback_context.triggered][0]
@@ -509,6 +808,14 @@ def on_click(btn1, btn2, btn3, btn4):
     selected_class = 'toggle-graph-button selected-graph-button'
     normal_class = 'toggle-graph-button'
 
+    # When the projection checkbox is clicked, redraw the graph for whichever button is already selected
+    show_projection = 'projection' in (projection or [])
+    if 'show-projection' in changed_id:
+        button_ids = ['show-sc-deaths', 'show-sc-cases', 'show-chs-deaths', 'show-chs-cases']
+        for button_id, class_name in zip(button_ids, [class1, class2, class3, class4]):
+            if class_name == selected_class:
+                changed_id = button_id
+
     # Based on which button was clicked, the following changes occur in the interface:
     # 1) fig: A new figure is created, showing the graph the user requested by clicking the button
     # 2) title: Change the title of the graph
@@ -524,25 +831,28 @@ def on_click(btn1, btn2, btn3, btn4):
     #     title = 'Daily Cases in Downtown Charleston'
     #     return fig, title, 'downtown-title', normal_class, normal_class, normal_class, normal_class
     if 'show-chs-cases' in changed_id:
-        fig = generate_fig(show_county_cases=True)
+        fig = generate_fig(show_county_cases=True, show_projection=show_projection)
         title = 'Daily Cases in Charleston County'
         return fig, title, 'county-title', normal_class, normal_class, normal_class, selected_class
     elif 'show-chs-deaths' in changed_id:
-        fig = generate_fig(show_county_deaths=True)
+        fig = generate_fig(show_county_deaths=True, show_projection=show_projection)
         title = 'Daily Deaths in Charleston County'
         return fig, title, 'county-title', normal_class, normal_class, selected_class, normal_class
     elif 'show-sc-cases' in changed_id:
-        fig = generate_fig(show_sc_cases=True)
+        fig = generate_fig(show_sc_cases=True, show_projection=show_projection)
         title = 'Daily Cases in South Carolina'
         return fig, title, 'sc-title', normal_class, selected_class, normal_class, normal_class
     elif 'show-sc-deaths' in changed_id:
-        fig = generate_fig(show_sc_deaths=True)
+        fig = generate_fig(show_sc_deaths=True, show_projection=show_projection)
         title = 'Daily Deaths in South Carolina'
         return fig, title, 'sc-title', selected_class, normal_class, normal_class, normal_class
 
+    # No graph has been selected yet (e.g. the projection checkbox was clicked first), so there is nothing to redraw
+    raise dash.exceptions.PreventUpdate
+
 # Show the disclaimer and privacy policy popup shown when 'Disclaimer & Privacy Policy' is clicked
 # Also, close the popup when the X button is clicked
-@app.callback(
+@app.cached_callback(
     dash.dependencies.Output('popup-right', 'style'),
     [
         dash.dependencies.Input('open-disclaimer', 'n_clicks'),
@@ -565,7 +875,7 @@ def right_popup(btn1, btn2):
 
 # Show the 'About' popup shown when 'About the Developer' is clicked
 # Also, close the popup when the X button is clicked
-@app.callback(
+@app.cached_callback(
     dash.dependencies.Output('popup-left', 'style'),
     [dash.dependencies.Input('open-about', 'n_clicks'),
      dash.dependencies.Input('close-about', 'n_clicks')]
@@ -584,5 +894,15 @@ def left_popup(btn1, btn2):
     elif changed_id == 'close-about':
         return {'display': 'none'}
 
+# While the page saying the data is loading is shown, check whether the data has arrived, and if it has, reload the page
+@app.callback(
+    dash.dependencies.Output('loading-location', 'href'),
+    [dash.dependencies.Input('loading-interval', 'n_intervals')]
+)
+def reload_when_loaded(n_intervals):
+    if data_store.is_loading():
+        raise dash.exceptions.PreventUpdate
+    return app.config.requests_pathname_prefix
+
 if __name__ == '__main__':
     app.run_server()
@@ -0,0 +1,70 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   bench_figure.py
+  End Result:  Compares the time to build and serialize a figure from the layout and graph styles built once by app.py
+               against building and validating a plotly.graph_objects.Figure for every request
+  Usage:       python benchmarks/bench_figure.py [repeat]
+               Run from the top directory of the repository, since app.py loads its data (snapshot.pickle, or the
+               locations in SNAPSHOT_PATH or COVID_DATA_SOURCE) and assets when it is imported
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import json
+import os
+import sys
+import timeit
+import plotly
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import app  # Local file: app.py
+
+# Without a snapshot saved on disk, app.py starts before the data arrives, so wait for it before timing anything
+app.data_refresh_thread.join()
+if app.data_store.is_loading():
+    sys.exit('Could not retrieve the data: {}'.format(app.data_store.last_error))
+
+# The graphs shown by each button, with and without a projection
+FIGURES = [
+    dict(show_county_cases=True),
+    dict(show_county_deaths=True),
+    dict(show_sc_cases=True),
+    dict(show_sc_deaths=True, show_projection=True),
+]
+
+
+def build_figures():
+    """Build and serialize every figure from the layout and graph styles that app.py built once"""
+    return [json.dumps(app.generate_fig(**options), cls=plotly.utils.PlotlyJSONEncoder) for options in FIGURES]
+
+
+def build_validated_figures():
+    """Build and serialize the same figures, but as a plotly.graph_objects.Figure that Plotly validates every time,
+    which is how every figure was built before the layout and graph styles were built once"""
+    serialized = []
+    for options in FIGURES:
+        fig = app.generate_fig(**options)
+        validated = go.Figure(layout=go.Layout(fig['layout']))
+        for graph in fig['data']:
+            validated.add_trace(go.Bar(graph) if graph['type'] == 'bar' else go.Scatter(graph))
+        serialized.append(json.dumps(validated, cls=plotly.utils.PlotlyJSONEncoder))
+    return serialized
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # generate_fig() checks the device viewing the webpage, so it has to run inside a request
+    with app.server.test_request_context('/'):
+        app.server.preprocess_request()
+
+        # Make sure both approaches give the same figures before timing them
+        for fast, validated in zip(build_figures(), build_validated_figures()):
+            assert json.loads(fast) == json.loads(validated)
+
+        fast_time = min(timeit.repeat(build_figures, number=1, repeat=repeat))
+        validated_time = min(timeit.repeat(build_validated_figures, number=1, repeat=repeat))
+
+    print('{} figures, built and serialized to JSON'.format(len(FIGURES)))
+    print('  app.generate_fig() with shared styles: {:8.1f} ms'.format(fast_time * 1000))
+    print('  plotly.graph_objects.Figure:           {:8.1f} ms'.format(validated_time * 1000))
+    print('  speedup:                               {:8.1f}x'.format(validated_time / fast_time))
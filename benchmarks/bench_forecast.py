@@ -0,0 +1,59 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   bench_forecast.py
+  End Result:  Compares the time to fit projections for every geography at once with forecast.py against one
+               numpy.polyfit() call per geography
+  Usage:       python benchmarks/bench_forecast.py [geographies] [days]
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import forecast  # Local file: forecast.py
+
+FIT_DAYS = 28
+HORIZON = 14
+
+
+def per_series_forecast(daily):
+    """Compute the same projections as forecast.forecast_log_linear(), but with a separate fit for each geography"""
+    projections = {}
+    x = np.arange(FIT_DAYS)
+    future_x = np.arange(FIT_DAYS, FIT_DAYS + HORIZON)
+    for geography in daily.columns:
+        average = daily[geography].rolling(7).mean().iloc[-FIT_DAYS:]
+        slope, intercept = np.polyfit(x, np.log1p(average.clip(lower=0).values), 1)
+        projections[geography] = np.maximum(np.expm1(intercept + slope * future_x), 0)
+    return projections
+
+
+if __name__ == '__main__':
+    geographies = int(sys.argv[1]) if len(sys.argv) > 1 else 3300
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    # Random daily counts stand in for the real data, so the benchmark doesn't depend on the network
+    random = np.random.RandomState(0)
+    growth = np.exp(np.linspace(0, 1, days))[:, np.newaxis] * random.uniform(1, 100, size=geographies)
+    daily = pd.DataFrame(random.poisson(growth).astype(float),
+                         index=pd.date_range('2020-01-22', periods=days),
+                         columns=['geography_{}'.format(i) for i in range(geographies)])
+
+    # Make sure both approaches give the same answer before timing them
+    vectorized = forecast.forecast_log_linear(daily, FIT_DAYS, HORIZON)
+    per_series = per_series_forecast(daily)
+    for geography in daily.columns[:50]:
+        assert np.allclose(vectorized['projection'][geography].values, per_series[geography])
+
+    repeat = 3
+    vectorized_time = min(timeit.repeat(lambda: forecast.forecast_log_linear(daily, FIT_DAYS, HORIZON), number=1,
+                                        repeat=repeat))
+    per_series_time = min(timeit.repeat(lambda: per_series_forecast(daily), number=1, repeat=repeat))
+    print('{:,} geographies x {:,} days, fit on the last {} days, projected {} days'.format(geographies, days,
+                                                                                           FIT_DAYS, HORIZON))
+    print('  forecast.forecast_log_linear():  {:8.1f} ms'.format(vectorized_time * 1000))
+    print('  numpy.polyfit(), one per series: {:8.1f} ms'.format(per_series_time * 1000))
+    print('  speedup:                         {:8.1f}x'.format(per_series_time / vectorized_time))
@@ -0,0 +1,58 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   bench_trends.py
+  End Result:  Compares the time to compute moving averages and growth trends with trends.py against one pandas
+               rolling() call per geography
+  Usage:       python benchmarks/bench_trends.py [geographies] [days]
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import trends  # Local file: trends.py
+
+WINDOWS = (7, 14, 28)
+
+
+def per_series_trends(daily):
+    """Compute the same trends as trends.compute_trends(), but with separate pandas calls for each geography"""
+    results = {}
+    for geography in daily.columns:
+        series = daily[geography]
+        averages = {window: series.rolling(window).mean() for window in WINDOWS}
+        earlier = averages[7].shift(7)
+        ratio = averages[7] / earlier
+        results[geography] = (averages, ratio.where(earlier > 0) - 1)
+    return results
+
+
+if __name__ == '__main__':
+    geographies = int(sys.argv[1]) if len(sys.argv) > 1 else 3300
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    # Random daily counts stand in for the real data, so the benchmark doesn't depend on the network
+    random = np.random.RandomState(0)
+    daily = pd.DataFrame(random.poisson(20, size=(days, geographies)).astype(float),
+                         index=pd.date_range('2020-01-22', periods=days),
+                         columns=['geography_{}'.format(i) for i in range(geographies)])
+
+    # Make sure both approaches give the same answer before timing them
+    vectorized = trends.compute_trends(daily, WINDOWS)
+    per_series = per_series_trends(daily)
+    for geography in daily.columns[:50]:
+        averages, growth = per_series[geography]
+        for window in WINDOWS:
+            assert np.allclose(vectorized['avg_{}'.format(window)][geography], averages[window], equal_nan=True)
+        assert np.allclose(vectorized['growth'][geography], growth, equal_nan=True)
+
+    repeat = 3
+    vectorized_time = min(timeit.repeat(lambda: trends.compute_trends(daily, WINDOWS), number=1, repeat=repeat))
+    per_series_time = min(timeit.repeat(lambda: per_series_trends(daily), number=1, repeat=repeat))
+    print('{:,} geographies x {:,} days, windows {}'.format(geographies, days, WINDOWS))
+    print('  trends.compute_trends():  {:8.1f} ms'.format(vectorized_time * 1000))
+    print('  pandas, one per series:   {:8.1f} ms'.format(per_series_time * 1000))
+    print('  speedup:                  {:8.1f}x'.format(per_series_time / vectorized_time))
@@ -0,0 +1,127 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   load_test.py
+  End Result:  Sends many requests at once to a running copy of the webpage and reports throughput and latency
+  Usage:       python benchmarks/load_test.py [--url URL] [--concurrency N] [--requests N] [--scenario NAME]
+               Scenarios: 'page' (the HTML page), 'layout' (the layout JSON), 'callback' (a "Show Graph" button click),
+               'mixed' (a page load, then the layout, then a button click, as a new visitor would), or 'rotate' (button
+               clicks that rotate through every button, projection setting, selected graph, and device class)
+               Every 'callback' and 'mixed' visit sends the same click, so after the first one they measure responses
+               from the cache. Run 'rotate' against a freshly started server (or right after new data arrives) to
+               include the responses that have to be computed.
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import random
+import time
+import urllib.request
+
+DESKTOP_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) load_test.py'
+MOBILE_USER_AGENT = 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) Mobile load_test.py'
+
+# Values of the "Show 14-Day Projection" checkbox and the classes of the "Show Graph" buttons in app.py
+PROJECTION_VALUES = [[], ['projection']]
+NORMAL_CLASS = 'toggle-graph-button'
+SELECTED_CLASS = 'toggle-graph-button selected-graph-button'
+
+
+def send(url, body=None, user_agent=DESKTOP_USER_AGENT):
+    """Send one request (a POST if body is provided, otherwise a GET) and return how long it took, in seconds"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    headers = {'User-Agent': user_agent, 'Content-Type': 'application/json'}
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=60) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def get_graph_callback(url):
+    """Return the callback for the "Show Graph" buttons (the first callback the webpage reports at
+    /_dash-dependencies)"""
+    with urllib.request.urlopen(urllib.request.Request(url + '/_dash-dependencies',
+                                                       headers={'User-Agent': DESKTOP_USER_AGENT})) as response:
+        return json.loads(response.read().decode('utf-8'))[0]
+
+
+def get_button_click(callback, clicked=0, projection=0, selected=None):
+    """Return the body of a callback request for clicking a button (or the projection checkbox), given the index of the
+    input that was clicked, the index of the projection setting in PROJECTION_VALUES, and the index of the button whose
+    graph is already selected (or None)"""
+    inputs = [dict(input, value=PROJECTION_VALUES[projection] if input['property'] == 'value' else 1)
+              for input in callback['inputs']]
+    state = [dict(item, value=SELECTED_CLASS if i == selected else NORMAL_CLASS)
+             for i, item in enumerate(callback.get('state', []))]
+    changed = '{}.{}'.format(inputs[clicked]['id'], inputs[clicked]['property'])
+    return {'output': callback['output'], 'inputs': inputs, 'state': state, 'changedPropIds': [changed]}
+
+
+def get_rotating_clicks(callback):
+    """Return a list of (body, user agent) for every combination of the input clicked, the projection setting, the
+    graph already selected, and the device class, in a shuffled order"""
+    selected_options = [None] + list(range(len(callback.get('state', []))))
+    combinations = itertools.product(range(len(callback['inputs'])), range(len(PROJECTION_VALUES)), selected_options,
+                                     [DESKTOP_USER_AGENT, MOBILE_USER_AGENT])
+    clicks = [(get_button_click(callback, clicked, projection, selected), user_agent)
+              for clicked, projection, selected, user_agent in combinations]
+    random.Random(0).shuffle(clicks)
+    return clicks
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at the given fraction (e.g. 0.99) of a sorted list"""
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test a running copy of the webpage')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--scenario', choices=['page', 'layout', 'callback', 'mixed', 'rotate'], default='mixed')
+    args = parser.parse_args()
+    url = args.url.rstrip('/')
+    callback_url = url + '/_dash-update-component'
+
+    # Each visit is a list of (url, body, user agent) requests sent one after another, like a single visitor would
+    callback = get_graph_callback(url) if args.scenario in ('callback', 'mixed', 'rotate') else None
+    if args.scenario == 'rotate':
+        clicks = get_rotating_clicks(callback)
+        visits = [[(callback_url, body, user_agent)] for body, user_agent in clicks]
+    else:
+        click = get_button_click(callback) if callback is not None else None
+        visits = [{
+            'page': [(url + '/', None, DESKTOP_USER_AGENT)],
+            'layout': [(url + '/_dash-layout', None, DESKTOP_USER_AGENT)],
+            'callback': [(callback_url, click, DESKTOP_USER_AGENT)],
+            'mixed': [(url + '/', None, DESKTOP_USER_AGENT), (url + '/_dash-layout', None, DESKTOP_USER_AGENT),
+                      (callback_url, click, DESKTOP_USER_AGENT)],
+        }[args.scenario]]
+
+    def visit(visit_number):
+        return [send(step_url, body, user_agent) for step_url, body, user_agent in visits[visit_number % len(visits)]]
+
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for future in concurrent.futures.as_completed([executor.submit(visit, i) for i in range(args.requests)]):
+            try:
+                latencies.extend(future.result())
+            except Exception:
+                errors += 1
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print('{} scenario, {:,} visits at concurrency {} against {}'.format(args.scenario, args.requests,
+                                                                        args.concurrency, url))
+    if args.scenario == 'rotate':
+        print('  distinct:    {:,} different clicks, computed on the first request and then cached'.format(len(visits)))
+    print('  requests:    {:,} ok, {:,} failed visits'.format(len(latencies), errors))
+    print('  throughput:  {:,.1f} requests/second'.format(len(latencies) / elapsed))
+    if latencies:
+        for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            print('  {}:         {:8.1f} ms'.format(name, percentile(latencies, fraction) * 1000))
+        print('  max:         {:8.1f} ms'.format(latencies[-1] * 1000))
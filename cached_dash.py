@@ -0,0 +1,97 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   cached_dash.py
+  End Result:  A Dash app that serializes its layout and callback responses once per version of the data, instead of
+               once per request
+  Outline:     1) CachedDash: A subclass of dash.Dash which serves its layout and callback responses from caches
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import json
+import threading
+import dash
+from dash._utils import create_callback_id
+import flask
+import plotly
+import response_cache  # Local file: response_cache.py
+
+
+class CachedDash(dash.Dash):
+    """A subclass of dash.Dash which serves its layout and callback responses from caches"""
+
+    # Number of serialized layouts to keep (e.g. one per device class for the current and previous versions)
+    max_cached_layouts = 8
+
+    def __init__(self, *args, layout_version=None, callback_cache=None, **kwargs):
+        """Create a Dash app whose layout is serialized once per layout version. layout_version() is called on each
+        request and must return a string that changes whenever the layout would change (e.g. the data snapshot's
+        version along with the device class). Without a layout_version, nothing is cached. Responses from callbacks
+        registered with cached_callback() are saved in callback_cache (see response_cache.py), which defaults to an
+        LRUCache for this worker process."""
+        super().__init__(*args, **kwargs)
+        self.layout_version = layout_version
+        self.serialized_layouts = {}
+        self.serialized_layouts_lock = threading.Lock()
+        self.callback_cache = callback_cache if callback_cache is not None else response_cache.LRUCache()
+        self.cached_callback_vary_on = {}
+
+    def serve_layout(self):
+        """Serve the layout JSON for the current layout version, serializing it only the first time it is requested.
+        The layout version is also sent as an ETag, so browsers that already have this layout get an empty response."""
+        if self.layout_version is None:
+            return super().serve_layout()
+
+        version = self.layout_version()
+        if version in flask.request.if_none_match:
+            return flask.Response(status=304)
+
+        serialized_layout = self.serialized_layouts.get(version)
+        if serialized_layout is None:
+            serialized_layout = json.dumps(self._layout_value(), cls=plotly.utils.PlotlyJSONEncoder).encode('utf-8')
+
+            # If the version changed while the layout was being built (e.g. new data arrived), the layout may be a
+            # mix of both versions, so it is served this once but not saved
+            if self.layout_version() != version:
+                return flask.Response(serialized_layout, mimetype='application/json')
+
+            with self.serialized_layouts_lock:
+                # Dictionaries keep insertion order, so the oldest layouts are removed first
+                while len(self.serialized_layouts) >= self.max_cached_layouts:
+                    del self.serialized_layouts[next(iter(self.serialized_layouts))]
+                self.serialized_layouts[version] = serialized_layout
+
+        response = flask.Response(serialized_layout, mimetype='application/json')
+        response.set_etag(version)
+        response.cache_control.no_cache = True
+        return response
+
+    def cached_callback(self, output, inputs=[], state=[], vary_on=[]):
+        """Register a callback just like callback(), for a callback whose response depends only on which input
+        triggered it, the layout version, and the values of the inputs and state listed in vary_on (as 'id.property').
+        The values of any other inputs (such as the number of clicks) are ignored. Its responses are saved in
+        callback_cache, so each one is only computed once per layout version."""
+        self.cached_callback_vary_on[create_callback_id(output)] = set(vary_on)
+        return self.callback(output, inputs, state)
+
+    def dispatch(self):
+        """Serve a callback response, from callback_cache if the callback was registered with cached_callback() and the
+        same input has already triggered it for the current layout version"""
+        body = flask.request.get_json()
+        if self.layout_version is None or body.get('output') not in self.cached_callback_vary_on:
+            return super().dispatch()
+
+        vary_on = self.cached_callback_vary_on[body['output']]
+        values = sorted(['{}.{}'.format(item['id'], item['property']), item.get('value')]
+                        for item in body.get('inputs', []) + body.get('state', [])
+                        if '{}.{}'.format(item['id'], item['property']) in vary_on)
+        version = self.layout_version()
+        key = json.dumps([body['output'], sorted(body.get('changedPropIds') or []), values, version])
+        cached_response = self.callback_cache.get(key)
+        if cached_response is not None:
+            return flask.Response(cached_response, mimetype='application/json')
+
+        # Responses that aren't a normal update (e.g. a PreventUpdate, which raises an exception) aren't saved, and
+        # neither are responses built while the layout version changed
+        response = super().dispatch()
+        if response.status_code == 200 and self.layout_version() == version:
+            self.callback_cache.set(key, response.get_data())
+        return response
@@ -0,0 +1,102 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   check_data_quality.py
+  End Result:  Checks that data_quality.py keeps the promises in its docstring on a small table of made-up cumulative
+               counts: no negative days, the same total number of cases, days that drop and recover filled in, and
+               spikes only where there was a backlog
+  Usage:       python checks/check_data_quality.py
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import data_quality  # Local file: data_quality.py
+
+
+def make_cumulative_counts(days=60):
+    """Return a dataframe of cumulative counts with one of each kind of anomaly, one per geography"""
+    dates = pd.date_range('2020-03-01', periods=days)
+    steady = np.arange(days) * 5.0
+
+    # A backlog of 500 older cases reported all at once on day 40
+    backlog = steady.copy()
+    backlog[40:] += 500
+
+    # The cumulative count is revised downward twice, so the daily counts would be negative
+    revised = steady.copy()
+    revised[20] += 30
+    revised[35:] -= 12
+
+    # A real outbreak: no cases at all, then 60 or more new cases every day
+    outbreak = np.concatenate([np.zeros(30), np.cumsum(np.round(np.linspace(60, 120, days - 30)))])
+
+    # A geography that starts reporting late and skips a few days
+    late = steady.copy()
+    late[:10] = np.nan
+    late[25:28] = np.nan
+
+    cumulative = pd.DataFrame({'backlog': backlog, 'revised': revised, 'outbreak': outbreak, 'late': late},
+                              index=dates)
+
+    # A date with no row at all for any geography
+    return cumulative.drop(dates[50])
+
+
+def make_dropped_counts():
+    """Return a dataframe of cumulative counts that drop and then recover, along with the daily counts expected for
+    each geography"""
+    dates = pd.date_range('2020-03-01', periods=8)
+    cumulative = pd.DataFrame({
+        # A single bad day, after which the count recovers
+        'one_bad_day': [100, 150, 200, 250, 0, 300, 350, 400],
+        # Two bad days in a row
+        'two_bad_days': [100, 150, 0, 0, 200, 250, 300, 350],
+        # A count revised downward for good, which never gets back to 300
+        'revised': [100, 200, 300, 250, 260, 270, 280, 290],
+    }, index=dates)
+    expected = pd.DataFrame({
+        'one_bad_day': [0, 50, 50, 50, 0, 50, 50, 50],
+        'two_bad_days': [0, 50, 0, 0, 50, 50, 50, 50],
+        'revised': [0, 100, 50, 0, 10, 10, 10, 10],
+    }, index=dates, dtype=float)
+    return cumulative, expected
+
+
+def check_daily_counts(cumulative, daily):
+    """Check that no day is negative and that the daily counts add up to the same total as the cumulative counts"""
+    filled = cumulative.reindex(daily.index).ffill().fillna(0)
+    assert (daily.values >= 0).all(), 'negative daily counts'
+    expected_totals = filled.iloc[-1] - filled.min().clip(lower=0)
+    assert np.allclose(daily.sum().values, expected_totals.values), 'totals changed: {} != {}'.format(
+        daily.sum().to_dict(), expected_totals.to_dict())
+
+
+if __name__ == '__main__':
+    cumulative = make_cumulative_counts()
+
+    daily, report = data_quality.validate_cumulative_counts(cumulative)
+    check_daily_counts(cumulative, daily)
+    assert len(daily) == 60, 'missing date was not filled in'
+    assert report.loc['revised', 'negative_days'] == 2, report
+    assert report.loc['backlog', 'spike_days'] == 1, report
+    assert report.loc['outbreak', 'spike_days'] == 0, 'the start of a real outbreak was flagged as a backlog'
+    assert report.loc['late', 'missing_days'] == 4, report
+    assert daily.loc['2020-04-10', 'backlog'] == 505, 'spikes are only corrected when redistribute_spikes is True'
+    print('validate_cumulative_counts(): ok')
+    print(report.to_string())
+
+    # Days that drop and then recover are filled in, instead of erasing every day before them
+    dropped, expected = make_dropped_counts()
+    dropped_daily, dropped_report = data_quality.validate_cumulative_counts(dropped)
+    pd.testing.assert_frame_equal(dropped_daily, expected, check_freq=False)
+    assert (dropped_report['negative_days'] == 1).all(), dropped_report
+    print('validate_cumulative_counts() with counts that drop and recover: ok')
+
+    daily, report = data_quality.validate_cumulative_counts(cumulative, redistribute_spikes=True)
+    check_daily_counts(cumulative, daily)
+    assert daily.loc['2020-04-10', 'backlog'] == 5, 'the backlog was not spread over the days before it'
+    assert daily['outbreak'].equals(data_quality.validate_cumulative_counts(cumulative)[0]['outbreak'])
+    print('validate_cumulative_counts(redistribute_spikes=True): ok')
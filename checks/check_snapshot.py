@@ -0,0 +1,114 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   check_snapshot.py
+  End Result:  Checks that snapshot.py keeps serving data when retrieving fresh data fails, using a stand-in loader
+               that can be made to wait or fail instead of downloading the real data
+  Usage:       python checks/check_snapshot.py
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import snapshot  # Local file: snapshot.py
+
+
+class StandInLoader:
+    """Stands in for the function that retrieves the real data. Each call returns the next item in results, or raises
+    it if it is an exception. If a gate is provided, each call waits until the gate is opened."""
+
+    def __init__(self, results, gate=None):
+        self.results = list(results)
+        self.gate = gate
+        self.calls = 0
+
+    def __call__(self):
+        if self.gate is not None:
+            self.gate.wait()
+        result = self.results[min(self.calls, len(self.results) - 1)]
+        self.calls += 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def wait_until(condition, timeout=5):
+    """Wait until condition() is True, for at most timeout seconds"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+if __name__ == '__main__':
+    # The errors logged on purpose below would only clutter the output
+    logging.disable(logging.CRITICAL)
+    upstream_down = ConnectionError('GitHub is down')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot.pickle')
+
+        # A new server with nothing saved on disk starts right away, and shows that the data is loading until it arrives
+        gate = threading.Event()
+        store = snapshot.SnapshotStore(StandInLoader([{'cases': 1}, upstream_down], gate), path)
+        refresh_thread = store.start()
+        assert store.is_loading() and store.get() is None
+        gate.set()
+        refresh_thread.join()
+        assert not store.is_loading() and store.get().data == {'cases': 1} and os.path.exists(path)
+        print('Starts without waiting for the data, then serves it once it arrives: ok')
+
+        # When a refresh fails, the data already retrieved keeps being served and is marked as stale
+        assert not store.refresh()
+        assert store.get().data == {'cases': 1} and store.is_stale()
+        print('Keeps the old data when a refresh fails: ok')
+
+        # A server restarted while the upstream data is down serves the snapshot saved on disk right away
+        gate = threading.Event()
+        restarted_store = snapshot.SnapshotStore(StandInLoader([upstream_down], gate), path)
+        refresh_thread = restarted_store.start()
+        assert restarted_store.get().data == {'cases': 1} and not restarted_store.is_stale()
+        gate.set()
+        refresh_thread.join()
+        assert restarted_store.get().data == {'cases': 1} and restarted_store.is_stale()
+        print('Serves the snapshot saved on disk when the upstream data is down at startup: ok')
+
+        # Fresh data replaces the snapshot and clears the stale mark
+        restarted_store.loader = StandInLoader([{'cases': 2}])
+        assert restarted_store.refresh()
+        assert restarted_store.get().data == {'cases': 2} and not restarted_store.is_stale()
+        print('Replaces the snapshot once a refresh succeeds: ok')
+
+        # A new server that can't retrieve the data doesn't raise an error, and keeps retrying until it can
+        os.remove(path)
+        loader = StandInLoader([upstream_down, upstream_down, {'cases': 3}])
+        retrying_store = snapshot.SnapshotStore(loader, path, refresh_interval=datetime.timedelta(hours=12),
+                                                retry_interval=datetime.timedelta(seconds=0.05))
+        retrying_store.start().join()
+        assert retrying_store.is_loading() and retrying_store.is_stale()
+        assert wait_until(lambda: not retrying_store.is_loading()), 'the data was never retried'
+        assert retrying_store.get().data == {'cases': 3} and loader.calls == 3
+        print('Retries until the first data arrives: ok')
+
+        # Two worker processes that retrieve the same data have the same snapshot version and retrieval time, since the
+        # second one uses the snapshot the first one saved, and neither replaces its snapshot while the data is the same
+        os.remove(path)
+
+        def get_version(data):
+            return 'cases-{}'.format(data['cases'])
+
+        first_worker = snapshot.SnapshotStore(StandInLoader([{'cases': 4}]), path, get_version=get_version)
+        second_worker = snapshot.SnapshotStore(StandInLoader([{'cases': 4}]), path, get_version=get_version)
+        assert first_worker.refresh() and second_worker.refresh()
+        assert first_worker.get().version == second_worker.get().version == 'cases-4'
+        assert first_worker.get().created == second_worker.get().created
+        unchanged_snapshot = first_worker.get()
+        assert first_worker.refresh() and first_worker.get() is unchanged_snapshot
+        first_worker.loader = StandInLoader([{'cases': 5}])
+        assert first_worker.refresh() and first_worker.get().version == 'cases-5'
+        print('Worker processes with the same data share a snapshot version: ok')
@@ -0,0 +1,148 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   check_sources.py
+  End Result:  Checks that every data source in covid_data.py gives the same data: made-up datasets are written as CSV
+               files, imported into a SQLite database, and read back through each source
+  Usage:       python checks/check_sources.py
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import covid_data  # Local file: covid_data.py
+
+
+def make_jhu_table(random, variable, days=120):
+    """Return a made-up dataset laid out like the Johns Hopkins CSV files, with a few counties in two states along with
+    the 'Unassigned' and 'Out of <State>' rows Johns Hopkins lists for each state"""
+    dates = [date.strftime('%-m/%-d/%y') for date in pd.date_range('2020-01-22', periods=days)]
+    geographies = [('South Carolina', county) for county in ['Charleston', 'Richland', 'Greenville', 'Horry']]
+    geographies += [('Georgia', county) for county in ['Charleston', 'Fulton']]
+    geographies += [(state, name) for state in ['South Carolina', 'Georgia'] for name in ['Unassigned', 'Out of SC']]
+
+    rows = []
+    for i, (state, county) in enumerate(geographies):
+        row = dict(UID=84000000 + i, iso2='US', iso3='USA', code3=840, FIPS=1000.0 + i, Admin2=county,
+                   Province_State=state, Country_Region='US', Lat=32.8, Long_=-79.9,
+                   Combined_Key='{}, {}, US'.format(county, state))
+        if variable == 'deaths':
+            row['Population'] = 10000 * (i + 1)
+        daily = random.poisson(random.uniform(1, 40) * (0.02 if variable == 'deaths' else 1), size=days)
+        daily[random.randint(0, days, size=2)] = -3
+        row.update(zip(dates, np.cumsum(daily)))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def make_moved_jhu_table(variable):
+    """Return a made-up dataset laid out like the Johns Hopkins CSV files, in which 100 cases (or deaths) listed as
+    'Unassigned' are moved to Charleston County on the fifth day"""
+    dates = [date.strftime('%-m/%-d/%y') for date in pd.date_range('2020-01-22', periods=6)]
+    counts = {'Unassigned': [100, 100, 100, 100, 0, 0], 'Charleston': [0, 10, 20, 30, 140, 150]}
+
+    rows = []
+    for i, (county, cumulative) in enumerate(counts.items()):
+        row = dict(UID=84000000 + i, iso2='US', iso3='USA', code3=840, FIPS=1000.0 + i, Admin2=county,
+                   Province_State='South Carolina', Country_Region='US', Lat=32.8, Long_=-79.9,
+                   Combined_Key='{}, South Carolina, US'.format(county))
+        if variable == 'deaths':
+            row['Population'] = 10000
+        row.update(zip(dates, cumulative))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def make_scdhec_table(random, days=120):
+    """Return a made-up dataset laid out like the SC DHEC CSV file, with one row per ZIP code per date"""
+    rows = []
+    for zip_code in [29401, 29403, 29424, 29455]:
+        cumulative = np.cumsum(random.poisson(5, size=days))
+        for date, total in zip(pd.date_range('2020-04-01', periods=days), cumulative):
+            rows.append(dict(Zip=zip_code, Date=date.strftime('%Y/%m/%d'), Total_Cases=total))
+    return pd.DataFrame(rows).sample(frac=1, random_state=0)
+
+
+def describe(data):
+    """Return everything the webpage uses from a StateData, CountyData, or ZIPCodeGroupData object"""
+    description = {'daily_cases': data.get_daily_cases(), 'total_cases': data.get_total_cases()}
+    if not isinstance(data, covid_data.ZIPCodeGroupData):
+        description.update(daily_deaths=data.get_daily_deaths(), total_deaths=data.get_total_deaths())
+    if isinstance(data, covid_data.StateData):
+        description.update(county_rates=data.get_county_rates(),
+                           county_table=data.get_county_table('deaths', data.state))
+    return description
+
+
+def assert_same(expected, actual, label):
+    """Check that two descriptions from describe() are the same"""
+    for key, value in expected.items():
+        if isinstance(value, pd.DataFrame):
+            pd.testing.assert_frame_equal(value, actual[key], check_dtype=False, obj='{} {}'.format(label, key))
+        elif isinstance(value, pd.Series):
+            pd.testing.assert_series_equal(value, actual[key], check_dtype=False, obj='{} {}'.format(label, key))
+        else:
+            assert value == actual[key], '{} {}: {} != {}'.format(label, key, value, actual[key])
+
+
+if __name__ == '__main__':
+    random = np.random.RandomState(0)
+    with tempfile.TemporaryDirectory() as directory:
+        make_jhu_table(random, 'cases').to_csv(os.path.join(directory, 'jhu_cases.csv'), index=False)
+        make_jhu_table(random, 'deaths').to_csv(os.path.join(directory, 'jhu_deaths.csv'), index=False)
+        make_scdhec_table(random).to_csv(os.path.join(directory, 'scdhec_cases.csv'), index=False)
+
+        names = ['jhu_cases', 'jhu_deaths', 'scdhec_cases']
+        local_source = covid_data.open_source(directory)
+        remote_source = covid_data.RemoteCSVSource({name: os.path.join(directory, name + '.csv') for name in names})
+        database_path = os.path.join(directory, 'covid.db')
+        covid_data.SQLiteSource(database_path, create=True).import_from(local_source, names)
+        sqlite_source = covid_data.open_source(database_path)
+
+        def load(source):
+            return {
+                'South Carolina': describe(covid_data.StateData('South Carolina', source)),
+                'Charleston County': describe(covid_data.CountyData('Charleston', 'South Carolina', source)),
+                'Downtown ZIP codes': describe(covid_data.ZIPCodeGroupData([29401, 29403, 29424], source)),
+            }
+
+        expected = load(local_source)
+        for source_name, source in [('RemoteCSVSource', remote_source), ('SQLiteSource', sqlite_source)]:
+            for label, description in load(source).items():
+                assert_same(expected[label], description, '{} {}'.format(source_name, label))
+            print('{} gives the same data as LocalCSVSource: ok'.format(source_name))
+
+        # Only the requested geographies are read from the database
+        table = sqlite_source.read_table('jhu_cases', where={'Province_State': ['South Carolina'],
+                                                             'Admin2': ['Charleston']})
+        assert table['Combined_Key'].tolist() == ['Charleston, South Carolina, US'], table
+        assert len(sqlite_source.query('jhu_cases', table['UID'][0])) == 120
+        print('SQLiteSource reads a single geography: ok')
+
+        # Mistyped locations and dataset names are errors, instead of an empty database being created
+        for location in [os.path.join(directory, 'missing.db'), os.path.join(directory, 'missing')]:
+            try:
+                covid_data.open_source(location)
+            except (FileNotFoundError, ValueError):
+                assert not os.path.exists(location)
+            else:
+                raise AssertionError('open_source({}) did not raise an error'.format(location))
+        try:
+            sqlite_source.read_table('jhu_recovered')
+        except KeyError:
+            pass
+        else:
+            raise AssertionError('reading a dataset that is not in the database did not raise an error')
+        print('Missing databases and datasets raise errors: ok')
+
+    # Cases moved from 'Unassigned' to a county don't show up as a spike in the state's daily numbers
+    with tempfile.TemporaryDirectory() as directory:
+        make_moved_jhu_table('cases').to_csv(os.path.join(directory, 'jhu_cases.csv'), index=False)
+        make_moved_jhu_table('deaths').to_csv(os.path.join(directory, 'jhu_deaths.csv'), index=False)
+        state = covid_data.StateData('South Carolina', covid_data.open_source(directory))
+        assert state.get_daily_cases().tolist() == [0, 10, 10, 10, 10, 10], state.get_daily_cases()
+        assert state.get_daily_deaths().tolist() == [0, 10, 10, 10, 10, 10], state.get_daily_deaths()
+        print("StateData adds up the state's cumulative numbers before validating them: ok")
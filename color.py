@@ -6,26 +6,32 @@
 ---------------------------------------------------------------------------------------------------------------------"""
 
 class Color:
-    """Stores and formats strings for RGBA colors"""
+    """Stores and formats strings for RGBA colors. The string representation is built whenever a channel is set,
+    instead of every time the color is used."""
 
     def __init__(self, red, green, blue, alpha='None'):
         """Create a new Color by providing red, green, and blue channels. Alpha (aka transparency) is optional."""
-        self.set_red(red)
-        self.set_green(green)
-        self.set_blue(blue)
-        self.set_alpha(alpha)
+        self.red = str(red)
+        self.green = str(green)
+        self.blue = str(blue)
+        self.alpha = str(alpha)
+        self.update_string()
 
     def set_red(self, red):
         self.red = str(red)
+        self.update_string()
 
     def set_green(self, green):
         self.green = str(green)
+        self.update_string()
 
     def set_blue(self, blue):
         self.blue = str(blue)
+        self.update_string()
 
     def set_alpha(self, alpha):
         self.alpha = str(alpha)
+        self.update_string()
 
     def get_red(self):
         return self.red
@@ -39,21 +45,24 @@ class Color:
     def get_alpha(self):
         return self.alpha
 
+    def update_string(self):
+        """Build the string representations used by color_to_str() and __str__() from the current channels"""
+        self.rgba_prefix = 'rgba(' + self.red + ', ' + self.green + ', ' + self.blue + ', '
+        if self.alpha != 'None':
+            self.string = self.rgba_prefix + self.alpha + ')'
+        else:
+            self.string = 'rgb(' + self.red + ', ' + self.green + ', ' + self.blue + ')'
+
     def color_to_str(self, alpha='None'):
         """Print a string representation of the color. The alpha channel is optional."""
         if alpha != 'None':
-            return 'rgba(' + self.get_red() + ', ' + self.get_green() + ', ' + self.get_blue() + ', ' + str(alpha) + ')'
-        elif self.get_alpha() != 'None':
-            return 'rgba(' + self.get_red() + ', ' + self.get_green() + ', ' + self.get_blue() + ', ' + self.get_alpha() + ')'
+            return self.rgba_prefix + str(alpha) + ')'
         else:
-            return 'rgb(' + self.get_red() + ', ' + self.get_green() + ', ' + self.get_blue() + ')'
+            return self.string
 
     def __str__(self):
         """Print a string representation of the color. The alpha channel is optional. This method is the same as
         color_to_str(), expect that color_to_str() allows an alpha channel to be provided at the time the method is
         called. If you want __str__() to produce a string with an alpha channel, it must be set in the object's
         attribute named 'alpha'"""
-        if self.get_alpha() != 'None':
-            return 'rgba(' + self.get_red() + ', ' + self.get_green() + ', ' + self.get_blue() + ', ' + self.get_alpha() + ')'
-        else:
-            return 'rgb(' + self.get_red() + ', ' + self.get_green() + ', ' + self.get_blue() + ')'
\ No newline at end of file
+        return self.string
\ No newline at end of file
@@ -7,11 +7,20 @@
                4) CountyData: A subclass of JHUDataset which provides COVID-19 data for a specified county
                5) ZIPCodeData: A subclass of SCDHECOpenDataset which provides COVID-19 data for a specified ZIP code
                6) ZIPCodeGroupData: A subclass of SCDHECOpenDataset which provides data for a combination of ZIP codes
+               7) select_geographies: Keeps only the rows of a dataset for the requested geographies
+               8) RemoteCSVSource: Reads each dataset from a CSV file at a URL
+               9) LocalCSVSource: Reads each dataset from a CSV file in a local directory
+               10) SQLiteSource: Reads each dataset from a local SQLite database, one geography at a time if needed
+               11) open_source: Returns the data source at a location given as a string
   Author:      Connor Cozad (23ccozad@gmail.com)
   Created:     August 16, 2020
 ---------------------------------------------------------------------------------------------------------------------"""
 
+import os
+import sqlite3
 import pandas as pd
+import data_quality  # Local file: data_quality.py
+import trends  # Local file: trends.py
 pd.set_option('display.max_rows', 500)
 pd.set_option('display.max_columns', 500)
 
@@ -22,13 +31,21 @@ class JHUDataset:
     cases_url = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_confirmed_US.csv"
     deaths_url = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_deaths_US.csv"
 
-    def __init__(self):
-        """Retrieves COVID-19 data from Johns Hopkins Univ. and prepares the data to be queried by geography"""
+    # Whether spikes from backlogs of older cases reported all at once are spread over the days before them
+    redistribute_spikes = False
+
+    def __init__(self, source=None, where=None):
+        """Retrieves COVID-19 data from Johns Hopkins Univ. and prepares the data to be queried by geography. The data
+        is read from source (see RemoteCSVSource, LocalCSVSource, and SQLiteSource), which defaults to the CSV files in
+        the Johns Hopkins GitHub repo. If where is provided (e.g. {'Province_State': ['South Carolina']}), only those
+        geographies are kept, and sources that can (like SQLiteSource) only read those geographies."""
+        if source is None:
+            source = RemoteCSVSource({'jhu_cases': self.cases_url, 'jhu_deaths': self.deaths_url})
 
         ##### Manipulate dataframe for COVID-19 cases -----------------------------------------------------------------
 
         # Read the data into a dataframe
-        cases = pd.read_csv(self.cases_url)
+        cases = source.read_table('jhu_cases', where)
 
         # Transpose (turn rows into columns and columns into rows) the data and fix the resulting column titles
         cases = cases.transpose()
@@ -39,22 +56,29 @@ class JHUDataset:
         cases_meta = cases[:10]
         cases_meta = cases_meta.transpose()
 
-        # Data from Johns Hopkins provides the cumulative number of cases each day. Using diff() gives us the number of
-        # new cases per day instead
-        cases = cases[10:].diff()
-
         # Ensure that the dataframe rows are sorted in date order
+        cases = cases[10:]
         cases.index = pd.to_datetime(cases.index)
         cases.sort_index(inplace=True)
 
-        # Set our two dataframes as attributes
+        # Data from Johns Hopkins provides the cumulative number of cases each day. Validating the cumulative numbers
+        # gives us the number of new cases per day instead, with negative days, missing dates, and spikes corrected for
+        # every county at once
+        cumulative_cases = cases.astype(float)
+        cases, cases_anomalies = data_quality.validate_cumulative_counts(cumulative_cases, self.redistribute_spikes)
+        data_quality.log_report(cases_anomalies.rename(index=cases_meta['Combined_Key']), 'Johns Hopkins cases')
+
+        # Set our four dataframes as attributes. The cumulative numbers are kept so they can be added up for several
+        # geographies before they are validated (see StateData).
         self.cases = cases
+        self.cumulative_cases = cumulative_cases
         self.cases_meta = cases_meta
+        self.cases_anomalies = cases_anomalies
 
         ##### Manipulate dataframe for COVID-19 deaths -----------------------------------------------------------------
 
         # Read the data into a dataframe
-        deaths = pd.read_csv(self.deaths_url)
+        deaths = source.read_table('jhu_deaths', where)
 
         # Transpose (turn rows into columns and columns into rows) the data and fix the resulting column titles
         deaths = deaths.transpose()
@@ -65,17 +89,24 @@ class JHUDataset:
         deaths_meta = deaths[:11]
         deaths_meta = deaths_meta.transpose()
 
-        # Data from Johns Hopkins provides the cumulative number of deaths each day. Using diff() gives us the number
-        # of new deaths per day instead
-        deaths = deaths[11:].diff()
-
         # Ensure that the dataframe rows are sorted in date order
+        deaths = deaths[11:]
         deaths.index = pd.to_datetime(deaths.index)
         deaths.sort_index(inplace=True)
 
-        # Set our two dataframes as attributes
+        # Data from Johns Hopkins provides the cumulative number of deaths each day. Validating the cumulative numbers
+        # gives us the number of new deaths per day instead, with negative days, missing dates, and spikes corrected for
+        # every county at once
+        cumulative_deaths = deaths.astype(float)
+        deaths, deaths_anomalies = data_quality.validate_cumulative_counts(cumulative_deaths, self.redistribute_spikes)
+        data_quality.log_report(deaths_anomalies.rename(index=deaths_meta['Combined_Key']), 'Johns Hopkins deaths')
+
+        # Set our four dataframes as attributes. The cumulative numbers are kept so they can be added up for several
+        # geographies before they are validated (see StateData).
         self.deaths = deaths
+        self.cumulative_deaths = cumulative_deaths
         self.deaths_meta = deaths_meta
+        self.deaths_anomalies = deaths_anomalies
 
     def get_uid(self, variable, state=None, county=None):
         """Get the UID for a particular state or county."""
@@ -98,31 +129,85 @@ class JHUDataset:
             county_dataframe = dataframe.loc[(dataframe['Admin2'] == county) & (dataframe['Province_State'] == state)]
             return county_dataframe.index.values
 
+    def get_county_table(self, variable, state):
+        """Return a dataframe with the number of new cases or deaths each day for every county in the state, with one
+        column per county. Each county is a column of the same table, so trends can be computed for all of them at once
+        instead of creating a CountyData object for each one."""
+        if variable == 'cases':
+            dataframe, meta = self.cases, self.cases_meta
+        elif variable == 'deaths':
+            dataframe, meta = self.deaths, self.deaths_meta
+
+        # Johns Hopkins also lists 'Unassigned' and 'Out of <State>' rows for each state, which aren't counties
+        counties = meta.loc[meta['Province_State'] == state, 'Admin2']
+        counties = counties[~counties.isin(['Unassigned']) & ~counties.str.startswith('Out of', na=False)]
+        table = dataframe[counties.index]
+        table.columns = counties.values
+        return table
+
+    def get_county_population(self, state):
+        """Return a pandas series containing the population of every county in the state, indexed by county name"""
+        # Only the deaths dataset from Johns Hopkins includes each county's population
+        counties = self.deaths_meta.loc[self.deaths_meta['Province_State'] == state]
+        return pd.Series(counties['Population'].values.astype(float), counties['Admin2'].values)
+
 
 class SCDHECOpenDataset:
     """Retrieves and manipulates data from SC DHEC COVID-19 ArcGIS Open dataset"""
 
     cases_url = "https://opendata.arcgis.com/datasets/0b01284bff1f479d9fba1a8c516c3d97_0.csv"
 
-    def __init__(self):
-        """Retrieves COVID-19 data from SC DHEC and prepares the data to be queried by geography"""
+    # Whether spikes from backlogs of older cases reported all at once are spread over the days before them
+    redistribute_spikes = False
+
+    def __init__(self, source=None, where=None):
+        """Retrieves COVID-19 data from SC DHEC and prepares the data to be queried by geography. The data is read from
+        source (see RemoteCSVSource, LocalCSVSource, and SQLiteSource), which defaults to the SC DHEC ArcGIS CSV file.
+        If where is provided (e.g. {'Zip': [29401, 29403]}), only those ZIP codes are kept, and sources that can (like
+        SQLiteSource) only read those ZIP codes."""
+        if source is None:
+            source = RemoteCSVSource({'scdhec_cases': self.cases_url})
+
         # Read the data into dataframe, sort by date, and set as an attribute
-        cases = pd.read_csv(self.cases_url)
+        cases = source.read_table('scdhec_cases', where)
         cases['Date'] = pd.to_datetime(cases['Date'])
         cases.sort_values(by=['Date'], inplace=True)
         self.cases = cases
 
+        # Arrange the cumulative number of cases into one column per ZIP code, then validate the cumulative numbers to
+        # get the number of new cases per day, with negative days, missing dates, and spikes corrected for every ZIP
+        # code at once
+        cumulative_cases = cases.pivot_table(index='Date', columns='Zip', values='Total_Cases', aggfunc='sum')
+        self.daily_cases, self.cases_anomalies = data_quality.validate_cumulative_counts(cumulative_cases,
+                                                                                        self.redistribute_spikes)
+        data_quality.log_report(self.cases_anomalies, 'SC DHEC cases')
+
 
 class StateData(JHUDataset):
     """A subclass of JHUDataset which provides COVID-19 data for a specified state"""
     # Future Note: Additional state-level data available at https://api.covidtracking.com/v1/states/sc/daily.csv
 
-    def __init__(self, state):
-        """Get the COVID-19 data from JHUDataset for the specified state"""
-        super().__init__()
+    def __init__(self, state, source=None):
+        """Get the COVID-19 data from JHUDataset for the specified state. Only the state's counties are kept."""
+        super().__init__(source, where={'Province_State': [state]})
         self.state = state
-        self.state_cases = self.cases[self.get_uid('cases', state=state)].sum(axis=1).astype(int)
-        self.state_deaths = self.deaths[self.get_uid('deaths', state=state)].sum(axis=1).astype(int)
+
+        # Johns Hopkins sometimes moves cases from one of the state's rows to another (e.g. from 'Unassigned' to a
+        # county), which looks like a drop in one and a jump in the other. Adding up the cumulative numbers for the
+        # whole state before validating them keeps those moves from shifting the state's cases to a different day.
+        self.state_cases = self.validate_state_total(self.cumulative_cases[self.get_uid('cases', state=state)],
+                                                     'Johns Hopkins cases for ' + state)
+        self.state_deaths = self.validate_state_total(self.cumulative_deaths[self.get_uid('deaths', state=state)],
+                                                      'Johns Hopkins deaths for ' + state)
+
+    def validate_state_total(self, cumulative, dataset_name):
+        """Return a pandas series with the number of new cases or deaths each day for the whole state, given the
+        cumulative numbers for each of its rows"""
+        # A row with an empty cell keeps its previous cumulative number, like in validate_cumulative_counts()
+        state_cumulative = cumulative.ffill().sum(axis=1).to_frame(self.state)
+        daily, anomalies = data_quality.validate_cumulative_counts(state_cumulative, self.redistribute_spikes)
+        data_quality.log_report(anomalies, dataset_name)
+        return daily[self.state].astype(int)
 
     def get_total_cases(self):
         """Return the total number of COVID-19 cases for the state"""
@@ -148,13 +233,27 @@ class StateData(JHUDataset):
         """Return a pandas series containing the moving average for deaths per day for the state"""
         return self.state_deaths.rolling(days).mean()
 
+    def get_county_rates(self):
+        """Return a dataframe with one row per county in the state, containing the current 7-day average of new cases
+        per day, the same average per 100,000 residents, and the week-over-week growth of the average. The trends for
+        every county are computed at once from a single table, without creating a CountyData object for each county."""
+        latest = trends.latest_trends(self.get_county_table('cases', self.state), windows=(7,))
+        population = self.get_county_population(self.state).reindex(latest.index)
+        rates = pd.DataFrame({
+            'county': latest.index,
+            'average': latest['avg_7'].values,
+            'rate': (latest['avg_7'] / population.where(population > 0) * 100000).values,
+            'growth': latest['growth'].values,
+        })
+        return rates.sort_values(by='rate', ascending=False).reset_index(drop=True)
+
 
 class CountyData(JHUDataset):
     """A subclass of JHUDataset which provides COVID-19 data for a specified county"""
 
-    def __init__(self, county, state):
-        """Get the COVID-19 data from JHUDataset for the specified county"""
-        super().__init__()
+    def __init__(self, county, state, source=None):
+        """Get the COVID-19 data from JHUDataset for the specified county. Only the county is kept."""
+        super().__init__(source, where={'Province_State': [state], 'Admin2': [county]})
         self.county = county
         self.state = state
         self.county_cases = self.cases[self.get_uid('cases', county=county, state=state)].sum(axis=1).astype(int)
@@ -188,12 +287,11 @@ class CountyData(JHUDataset):
 class ZIPCodeData(SCDHECOpenDataset):
     """A subclass of SCDHECOpenDataset which provides COVID-19 data for a specified ZIP code"""
 
-    def __init__(self, zip_code):
-        """Get the COVID-19 data from SCDHECOpenDataset for the specified ZIP code"""
-        super().__init__()
+    def __init__(self, zip_code, source=None):
+        """Get the COVID-19 data from SCDHECOpenDataset for the specified ZIP code. Only the ZIP code is kept."""
+        super().__init__(source, where={'Zip': [zip_code]})
         self.zip_code = zip_code
-        cases = self.cases[self.cases['Zip'] == zip_code]
-        self.zip_code_cases = pd.Series(cases['Total_Cases'].values, cases['Date']).diff()[1:].astype(int)
+        self.zip_code_cases = self.daily_cases[zip_code][1:].astype(int)
 
     def get_total_cases(self):
         """Return the total number of COVID-19 cases for the ZIP code"""
@@ -211,13 +309,12 @@ class ZIPCodeData(SCDHECOpenDataset):
 class ZIPCodeGroupData(SCDHECOpenDataset):
     """A subclass of SCDHECOpenDataset which provides COVID-19 data for a combination of ZIP codes"""
 
-    def __init__(self, zip_code_group):
-        """Get the COVID-19 data from SCDHECOpenDataset across all the specified ZIP codes listed in zip_code_group"""
-        super().__init__()
+    def __init__(self, zip_code_group, source=None):
+        """Get the COVID-19 data from SCDHECOpenDataset across all the specified ZIP codes listed in zip_code_group.
+        Only those ZIP codes are kept."""
+        super().__init__(source, where={'Zip': list(zip_code_group)})
         self.zip_code_group = zip_code_group
-        cases = self.cases.loc[self.cases['Zip'].isin(zip_code_group)]
-        cases = pd.Series(cases['Total_Cases'].values, cases['Date']).groupby(['Date']).sum()
-        self.zip_code_group_cases = cases.diff()[1:].astype(int)
+        self.zip_code_group_cases = self.daily_cases[zip_code_group].sum(axis=1)[1:].astype(int)
 
     def get_total_cases(self):
         """Return the total number of COVID-19 cases across the combined ZIP codes"""
@@ -229,4 +326,172 @@ class ZIPCodeGroupData(SCDHECOpenDataset):
 
     def get_daily_cases_moving_avg(self, days):
         """Return a pandas series containing the moving average for new cases per day across the combined ZIP codes"""
-        return self.zip_code_group_cases.rolling(days).mean()
\ No newline at end of file
+        return self.zip_code_group_cases.rolling(days).mean()
+
+
+# Note: Every data source has a read_table(name, where=None) method, which returns a dataframe laid out exactly like the
+# original CSV file for that dataset. The datasets used above are named 'jhu_cases', 'jhu_deaths', and 'scdhec_cases'.
+# If where is provided, it is a dictionary matching columns that describe each geography to the values to keep (e.g.
+# {'Province_State': ['South Carolina'], 'Admin2': ['Charleston']}), and only the rows for those geographies are returned.
+
+
+def select_geographies(table, where=None):
+    """Return the rows of a dataframe laid out like an original CSV file that match where (see the note above)"""
+    if where is None:
+        return table
+    keep = pd.Series(True, index=table.index)
+    for column, values in where.items():
+        keep &= table[column].isin(values)
+    return table[keep].reset_index(drop=True)
+
+
+class RemoteCSVSource:
+    """Reads each dataset from a CSV file at a URL"""
+
+    def __init__(self, urls):
+        """Create a source from a dictionary matching each dataset name with the URL of its CSV file"""
+        self.urls = urls
+
+    def read_table(self, name, where=None):
+        """Return a dataframe containing the dataset with the given name. The whole file is downloaded, even if only
+        the geographies in where are kept."""
+        return select_geographies(pd.read_csv(self.urls[name]), where)
+
+
+class LocalCSVSource:
+    """Reads each dataset from a CSV file in a local directory"""
+
+    def __init__(self, directory):
+        """Create a source from a directory containing one CSV file per dataset, named after the dataset (for example,
+        jhu_cases.csv)"""
+        self.directory = directory
+
+    def read_table(self, name, where=None):
+        """Return a dataframe containing the dataset with the given name. The whole file is read, even if only the
+        geographies in where are kept."""
+        return select_geographies(pd.read_csv(os.path.join(self.directory, name + '.csv')), where)
+
+
+class SQLiteSource:
+    """Reads each dataset from a local SQLite database. Every count is stored as one row of a table indexed by
+    (geo_id, date), so the counts for one geography can be read without loading the rest of the dataset."""
+
+    def __init__(self, path, create=False):
+        """Create a source from the SQLite database at path. To build a new database, set create to True and use
+        import_table() or import_from() to add datasets to it. Otherwise, the database must already exist."""
+        if not create and not os.path.isfile(path):
+            raise FileNotFoundError('There is no SQLite database at {} (use create=True to build a new one)'.format(
+                path))
+        self.path = path
+        if not create:
+            return
+        with self.connect() as connection:
+            connection.execute('''CREATE TABLE IF NOT EXISTS datasets (
+                name TEXT PRIMARY KEY, geo_id_column TEXT, date_column TEXT, value_column TEXT)''')
+            connection.execute('''CREATE TABLE IF NOT EXISTS counts (
+                dataset TEXT, geo_id, date TEXT, value REAL, PRIMARY KEY (dataset, geo_id, date)) WITHOUT ROWID''')
+
+    def connect(self):
+        """Return a new connection to the database"""
+        return sqlite3.connect(self.path)
+
+    def import_table(self, name, table, geo_id_column, date_column=None, value_column=None):
+        """Add (or replace) the dataset with the given name from a dataframe laid out like its original CSV file.
+        Tables with one row per geography and one column per date (like Johns Hopkins) only need the geo_id_column.
+        Tables with one row per geography per date (like SC DHEC) also need the date_column and value_column."""
+        if date_column is None:
+            # Every column that is a date holds counts, and every other column describes the geography
+            dates = pd.to_datetime(pd.Series(table.columns), errors='coerce')
+            date_columns = [column for column, date in zip(table.columns, dates) if not pd.isnull(date)]
+            geographies = table.drop(columns=date_columns)
+            counts = table.melt(id_vars=[geo_id_column], value_vars=date_columns, var_name='date', value_name='value')
+            counts['date'] = counts['date'].map(dict(zip(date_columns, dates.dropna().dt.strftime('%Y-%m-%d'))))
+        else:
+            geographies = table[[geo_id_column]].drop_duplicates()
+            counts = table[[geo_id_column, date_column, value_column]].copy()
+            counts.columns = [geo_id_column, 'date', 'value']
+            counts['date'] = pd.to_datetime(counts['date']).dt.strftime('%Y-%m-%d')
+            counts = counts.groupby([geo_id_column, 'date'], as_index=False)['value'].sum()
+
+        with self.connect() as connection:
+            connection.execute('DELETE FROM counts WHERE dataset = ?', (name,))
+            connection.execute('INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?)',
+                               (name, geo_id_column, date_column, value_column))
+            geographies.to_sql(name + '_geographies', connection, if_exists='replace', index=False)
+            connection.executemany('INSERT INTO counts VALUES (?, ?, ?, ?)', zip(
+                [name] * len(counts), counts[geo_id_column].tolist(), counts['date'].tolist(),
+                counts['value'].tolist()))
+
+    def import_from(self, source, names):
+        """Add every dataset listed in names from another source (e.g. a RemoteCSVSource), laid out as expected by
+        JHUDataset and SCDHECOpenDataset"""
+        for name in names:
+            if name.startswith('jhu_'):
+                self.import_table(name, source.read_table(name), 'UID')
+            elif name.startswith('scdhec_'):
+                self.import_table(name, source.read_table(name), 'Zip', 'Date', 'Total_Cases')
+
+    def get_columns(self, connection, name):
+        """Return the geo_id_column, date_column, and value_column of the dataset with the given name"""
+        columns = connection.execute('SELECT geo_id_column, date_column, value_column FROM datasets WHERE name = ?',
+                                     (name,)).fetchone()
+        if columns is None:
+            raise KeyError('There is no dataset named {} in {}'.format(name, self.path))
+        return columns
+
+    def read_table(self, name, where=None, geo_ids=None):
+        """Return a dataframe containing the dataset with the given name, laid out like its original CSV file. If where
+        or a list of geo_ids is provided, the matching geographies are found first, and then only their counts are read
+        from the database."""
+        with self.connect() as connection:
+            geo_id_column, date_column, value_column = self.get_columns(connection, name)
+
+            # Find the geographies to read, using the table of columns that describe each geography
+            geographies_query = 'SELECT * FROM "{}_geographies"'.format(name)
+            parameters = []
+            if where is not None:
+                geographies_query += ' WHERE ' + ' AND '.join('"{}" IN ({})'.format(column, ', '.join('?' * len(values)))
+                                                              for column, values in where.items())
+                parameters = [value for values in where.values() for value in values]
+            geographies = pd.read_sql_query(geographies_query, connection, params=parameters)
+            if geo_ids is not None:
+                geographies = geographies[geographies[geo_id_column].isin(geo_ids)]
+
+            query = 'SELECT geo_id, date, value FROM counts WHERE dataset = ?'
+            parameters = [name]
+            if where is not None or geo_ids is not None:
+                query += ' AND geo_id IN ({})'.format(', '.join('?' * len(geographies)))
+                parameters += geographies[geo_id_column].tolist()
+            counts = pd.read_sql_query(query, connection, params=parameters)
+
+        if date_column is not None:
+            counts.columns = [geo_id_column, date_column, value_column]
+            return counts.sort_values(by=[date_column, geo_id_column]).reset_index(drop=True)
+
+        # Turn the rows of counts back into one column per date, after the columns that describe each geography
+        counts = counts.pivot(index='geo_id', columns='date', values='value')
+        return geographies.join(counts, on=geo_id_column).reset_index(drop=True)
+
+    def query(self, name, geo_id):
+        """Return a pandas series containing the counts for a single geography in the dataset with the given name,
+        indexed by date. Only that geography's rows are read from the database."""
+        # Numbers from numpy (e.g. a UID taken from a dataframe) have to be turned into Python numbers for SQLite
+        if hasattr(geo_id, 'item'):
+            geo_id = geo_id.item()
+        with self.connect() as connection:
+            self.get_columns(connection, name)
+            counts = pd.read_sql_query('SELECT date, value FROM counts WHERE dataset = ? AND geo_id = ? ORDER BY date',
+                                       connection, params=[name, geo_id])
+        return pd.Series(counts['value'].values, pd.to_datetime(counts['date']), name=geo_id)
+
+
+def open_source(location=None):
+    """Return the data source at location: a SQLite database (ending in .db or .sqlite), a local directory of CSV
+    files, or None to read the datasets from their original URLs"""
+    if location is None:
+        return None
+    elif location.endswith('.db') or location.endswith('.sqlite'):
+        return SQLiteSource(location)
+    elif os.path.isdir(location):
+        return LocalCSVSource(location)
+    raise ValueError('Unknown data source: {}'.format(location))
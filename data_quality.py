@@ -0,0 +1,121 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   data_quality.py
+  End Result:  Finds and corrects anomalies in cumulative COVID-19 counts before they are turned into daily counts
+  Outline:     1) validate_cumulative_counts: Turns a table of cumulative counts into clean daily counts, along with a
+                  report of the anomalies found for each geography
+               2) log_report: Logs a summary of the anomalies found in a dataset
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def validate_cumulative_counts(cumulative, redistribute_spikes=False, spike_window=14, spike_factor=10,
+                               spike_minimum=50, spike_reporting_days=7):
+    """Turn a dataframe of cumulative counts (one row per date, one column per geography) into a dataframe of daily
+    counts, finding and correcting anomalies for every geography at once:
+      - Missing dates: Dates with no row (or an empty cell) are filled in with the previous cumulative count
+      - Negative days: When a cumulative count drops for a few days and then recovers, the days in between are filled
+        in with the count before the drop. When a source revises its cumulative count downward for good, the earlier
+        days are lowered instead. Either way, no day is negative and the latest cumulative count stays the same.
+      - Spikes: Days with more than spike_factor times the average of the previous spike_window days (and at least
+        spike_minimum) are usually a backlog of older cases reported all at once. Only geographies with new cases on at
+        least spike_reporting_days of those days can have spikes, so the start of a real outbreak after days with no
+        cases isn't mistaken for a backlog. If redistribute_spikes is True, the excess is spread evenly over the
+        previous spike_window days.
+    Returns the dataframe of daily counts and a dataframe with the number of each anomaly found for each geography."""
+
+    ##### Fill in missing dates ----------------------------------------------------------------------------------------
+
+    # Make sure there is a row for every date between the first and last date
+    all_dates = pd.date_range(cumulative.index.min(), cumulative.index.max(), freq='D')
+    values = cumulative.reindex(all_dates).to_numpy(dtype=float)
+    rows = np.arange(values.shape[0])[:, np.newaxis]
+    columns = np.arange(values.shape[1])[np.newaxis, :]
+
+    # Empty cells before a geography's first count just mean it hadn't started reporting yet, so they aren't counted
+    empty = np.isnan(values)
+    started = np.maximum.accumulate(~empty, axis=0)
+    missing = empty & started
+
+    # Fill each empty cell with the most recent count before it, or 0 if there isn't one
+    last_filled_row = np.maximum.accumulate(np.where(empty, 0, rows), axis=0)
+    values = np.nan_to_num(values[last_filled_row, columns])
+
+    ##### Correct negative days ----------------------------------------------------------------------------------------
+
+    # A cumulative count can never go down. When it drops and a later count recovers to at least the count before the
+    # drop, the lower days are a mistake in the source, so they are treated as missing and filled in with the count
+    # before the drop. This goes one date at a time (for every geography at once), since each day that is filled in
+    # sets the count the next day is compared against.
+    negative = np.diff(values, axis=0, prepend=values[:1]) < 0
+    later_max = np.full(values.shape, -np.inf)
+    later_max[:-1] = np.maximum.accumulate(values[::-1], axis=0)[::-1][1:]
+    for row in range(1, values.shape[0]):
+        dip = (values[row] < values[row - 1]) & (later_max[row] >= values[row - 1])
+        values[row, dip] = values[row - 1, dip]
+
+    # When the drop lasts, the source revised its count downward, so each earlier day's count is lowered to the
+    # smallest count reported on or after that day. The latest count stays the same.
+    values = np.maximum(np.minimum.accumulate(values[::-1], axis=0)[::-1], 0)
+    daily = np.diff(values, axis=0, prepend=values[:1])
+
+    ##### Find (and optionally redistribute) spikes --------------------------------------------------------------------
+
+    # Average of the previous spike_window days for every day, along with the number of those days with new cases, using
+    # running totals instead of rolling windows
+    def previous_window_total(array):
+        running_total = np.cumsum(array, axis=0)
+        previous_total = np.zeros(array.shape)
+        previous_total[spike_window + 1:] = running_total[spike_window:-1] - running_total[:-spike_window - 1]
+        return previous_total
+
+    baseline = previous_window_total(daily) / spike_window
+    reporting_days = previous_window_total(daily > 0)
+
+    # Days without a full window before them can't be compared, so they are never spikes. Neither are days after a
+    # window with few days of new cases, since the first days of a real outbreak would look like a huge jump.
+    spike = ((daily > spike_factor * np.maximum(baseline, 1)) & (daily >= spike_minimum) &
+             (reporting_days >= spike_reporting_days))
+    spike[:spike_window + 1] = False
+
+    if redistribute_spikes:
+        # Each spike keeps the baseline amount, and the excess is spread evenly over the previous spike_window days.
+        # The amount added to each day is the total share of every spike in the spike_window days after it.
+        share = np.where(spike, (daily - baseline) / spike_window, 0)
+        running_share = np.cumsum(np.vstack([np.zeros((1, share.shape[1])), share]), axis=0)
+        added = np.zeros_like(daily)
+        added[:-1] = running_share[np.minimum(rows[:-1, 0] + spike_window + 1, share.shape[0])] - running_share[1:-1]
+        daily = np.where(spike, baseline, daily) + added
+
+        # Round through the cumulative counts, so the days stay whole numbers and the total stays the same
+        values = np.round(np.cumsum(daily, axis=0) + values[:1])
+        daily = np.diff(values, axis=0, prepend=values[:1])
+
+    daily = pd.DataFrame(daily, index=all_dates, columns=cumulative.columns)
+    report = pd.DataFrame({
+        'negative_days': negative.sum(axis=0),
+        'spike_days': spike.sum(axis=0),
+        'missing_days': missing.sum(axis=0),
+    }, index=cumulative.columns)
+    return daily, report
+
+
+def log_report(report, dataset_name, top=5):
+    """Log the total number of each anomaly in a report from validate_cumulative_counts(), along with the top
+    geographies with the most anomalies, so corrections made to the data can be seen in the server's logs"""
+    totals = report.sum()
+    affected = (report > 0).sum()
+    logger.info('%s: %d negative days in %d geographies, %d spikes in %d geographies, %d missing days in %d geographies',
+                dataset_name, totals['negative_days'], affected['negative_days'], totals['spike_days'],
+                affected['spike_days'], totals['missing_days'], affected['missing_days'])
+
+    worst = report.sum(axis=1).sort_values(ascending=False)
+    worst = worst[worst > 0].head(top)
+    if len(worst) > 0:
+        logger.info('%s: most anomalies in %s', dataset_name,
+                    ', '.join('{} ({})'.format(geography, count) for geography, count in worst.items()))
@@ -0,0 +1,51 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   forecast.py
+  End Result:  Projects the number of new cases or deaths per day for many geographies at once
+  Outline:     1) forecast_log_linear: Fits a log-linear trend to the recent 7-day moving average of every geography,
+                  and projects it forward with a confidence band
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import numpy as np
+import pandas as pd
+import trends  # Local file: trends.py
+
+
+def forecast_log_linear(daily, fit_days=28, horizon=14, z=1.96):
+    """Fit a log-linear trend (steady exponential growth or decline) to the last fit_days of the 7-day moving average
+    for every geography in a dataframe of daily counts (one row per date, one column per geography), and project it
+    horizon days past the last date. Every geography is fit at once with the same array operations, instead of one
+    fit per geography. Returns a dictionary of dataframes with one row per projected date and one column per geography:
+      - 'projection': The projected number per day
+      - 'lower' and 'upper': The confidence band around the projection (z=1.96 is about 95%)
+    along with 'daily_growth', a pandas series of the fitted growth rate per day for each geography."""
+    average = trends.moving_averages(daily.to_numpy(dtype=float), (7,))[0][-fit_days:]
+
+    # Fit log(average + 1) = intercept + slope * day by least squares. Adding 1 keeps days with no cases defined.
+    y = np.log1p(np.maximum(np.nan_to_num(average), 0))
+    x = np.arange(fit_days, dtype=float)
+    x_mean = x.mean()
+    x_spread = ((x - x_mean) ** 2).sum()
+    y_mean = y.mean(axis=0)
+    slope = ((x - x_mean)[:, np.newaxis] * (y - y_mean)).sum(axis=0) / x_spread
+
+    # The typical distance of the data from the fitted line sets how wide the confidence band is
+    fitted = y_mean + slope * (x - x_mean)[:, np.newaxis]
+    residual_spread = np.sqrt(((y - fitted) ** 2).sum(axis=0) / (fit_days - 2))
+
+    # Project forward, widening the band the further the projection is from the days used for the fit
+    future_x = np.arange(fit_days, fit_days + horizon, dtype=float)[:, np.newaxis]
+    projected = y_mean + slope * (future_x - x_mean)
+    standard_error = residual_spread * np.sqrt(1 + 1 / fit_days + (future_x - x_mean) ** 2 / x_spread)
+
+    future_dates = pd.date_range(daily.index[-1] + pd.Timedelta(days=1), periods=horizon, freq='D')
+
+    def to_dataframe(array):
+        return pd.DataFrame(np.maximum(np.expm1(array), 0), index=future_dates, columns=daily.columns)
+
+    return {
+        'projection': to_dataframe(projected),
+        'lower': to_dataframe(projected - z * standard_error),
+        'upper': to_dataframe(projected + z * standard_error),
+        'daily_growth': pd.Series(np.expm1(slope), index=daily.columns),
+    }
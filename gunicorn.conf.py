@@ -0,0 +1,32 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   gunicorn.conf.py
+  End Result:  Settings for running the webpage with gunicorn, set up to handle many users at once
+  Outline:     1) Worker processes and worker class
+               2) Timeouts
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import multiprocessing
+import os
+
+
+##### 1) Worker processes and worker class -----------------------------------------------------------------------------
+# The default 'sync' workers handle one request at a time, so a single slow client or a long generate_fig() blocks the
+# whole worker. 'gthread' workers handle several requests at once on threads, which works with the packages in
+# requirements.txt.
+# Note: gevent workers aren't recommended. The data is refreshed on a background thread, which gevent turns into a
+# greenlet, and parsing and validating the data with pandas and NumPy would then block every request on that worker.
+# Note: Every worker process loads its own copy of the data, so keep the number of workers small on small servers.
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+##### 2) Timeouts ------------------------------------------------------------------------------------------------------
+# Data is retrieved in the background (see snapshot.py), so workers start quickly even when there is no snapshot on disk
+# yet, and the timeout only has to leave room for slow requests.
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
@@ -0,0 +1,104 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   response_cache.py
+  End Result:  Caches serialized responses so identical requests don't have to be computed again
+  Outline:     1) LRUCache: Keeps the most recently used responses in memory, for a single worker process
+               2) FileSystemCache: Keeps responses in a local directory, so they are shared by every worker process
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+# Note: Both caches have the same two methods, get(key) and set(key, value), where key is a string and value is bytes.
+# Any other object with those two methods (e.g. a wrapper around a shared Redis server) can be used in their place.
+
+
+class LRUCache:
+    """Keeps the most recently used responses in memory, for a single worker process"""
+
+    def __init__(self, max_entries=256):
+        """Create an empty cache which holds at most max_entries responses"""
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return the response saved for key, or None if there isn't one"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Save the response for key, removing the least recently used response if the cache is full"""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class FileSystemCache:
+    """Keeps responses in a local directory, so they are shared by every worker process on the same machine. Only
+    responses saved under the same key are shared, so keys must not include anything specific to one process (such as
+    the time that process retrieved its data)."""
+
+    def __init__(self, directory, max_entries=1024):
+        """Create a cache which saves at most max_entries responses as files in directory"""
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, key):
+        """Return the path of the file where the response for key is saved"""
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        """Return the response saved for key, or None if there isn't one"""
+        try:
+            with open(self.get_path(key), 'rb') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def set(self, key, value):
+        """Save the response for key. If the cache is full, the oldest half of the responses are removed."""
+        # Each response is written to its own temporary file and then moved into place, so a thread reading the
+        # response never sees it half written, even while other threads (in this or other worker processes) are saving
+        # the same response
+        path = self.get_path(key)
+        try:
+            descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(value)
+            os.replace(temporary_path, path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            return
+
+        file_names = [name for name in os.listdir(self.directory) if not name.endswith('.tmp')]
+        if len(file_names) > self.max_entries:
+            paths = sorted((os.path.join(self.directory, name) for name in file_names), key=self._get_modified_time)
+            for old_path in paths[:len(paths) // 2]:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _get_modified_time(path):
+        """Return when the file at path was last modified, or 0 if it has already been removed"""
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
@@ -0,0 +1,157 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   snapshot.py
+  End Result:  Serves the last-known-good COVID-19 data from disk while fresh data is retrieved in the background
+  Outline:     1) Snapshot: One complete set of data objects, along with the time they were retrieved
+               2) SnapshotStore: Loads, saves, and refreshes snapshots without blocking the webpage
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import datetime
+import logging
+import os
+import pickle
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """One complete set of data objects, along with the time they were retrieved"""
+
+    def __init__(self, data, created=None, data_format=1, version=None):
+        """Create a new Snapshot from a dictionary of data objects. The creation time defaults to now, in UTC. The
+        data_format identifies which data objects are in the dictionary, so snapshots saved by older code can be
+        recognized. The version identifies the data (e.g. a hash of its contents), and defaults to the creation time."""
+        self.data = data
+        self.data_format = data_format
+        self.created = created if created is not None else datetime.datetime.now(datetime.timezone.utc)
+        self.version = version if version is not None else self.created.strftime('%Y%m%d%H%M%S%f')
+
+
+class SnapshotStore:
+    """Loads, saves, and refreshes snapshots without blocking the webpage"""
+
+    def __init__(self, loader, path, refresh_interval=None, data_format=1,
+                 retry_interval=datetime.timedelta(minutes=1), get_version=None):
+        """Create a store that calls loader() to retrieve fresh data and saves the last-known-good snapshot at path.
+        If refresh_interval (a timedelta) is provided, the data is also refreshed that often in the background. Until
+        there is any data to serve, retrieving it is retried every retry_interval instead. Change data_format whenever
+        loader() starts returning different data objects, so older snapshots on disk are ignored.
+
+        If get_version is provided, get_version(data) must return a string that identifies the data returned by
+        loader() (e.g. a hash of its contents). Every process that retrieves the same data then has the same snapshot
+        version, so anything cached by version can be shared between them. Without it, the version is the time the
+        data was retrieved, which is different in every process."""
+        self.loader = loader
+        self.path = path
+        self.get_version = get_version
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.data_format = data_format
+        self.snapshot = None
+        self.last_error = None
+        self.refresh_lock = threading.Lock()
+
+    def start(self):
+        """Serve the snapshot saved on disk right away and retrieve fresh data in the background. This never waits for
+        the data or raises an error, even if there is no snapshot saved on disk yet (e.g. on a new server) and the data
+        can't be retrieved. In that case get() returns None until the data arrives, so the webpage can show that the
+        data is still loading. Returns the background thread retrieving the data."""
+        self.snapshot = self.read_from_disk()
+        refresh_thread = self.refresh_in_background()
+
+        thread = threading.Thread(target=self._refresh_periodically, name='snapshot-refresh-timer')
+        thread.daemon = True
+        thread.start()
+        return refresh_thread
+
+    def get(self):
+        """Return the current snapshot, or None if no data has been retrieved yet. The snapshot is replaced as a whole,
+        so callers always see a consistent set of data objects even while a refresh is happening."""
+        return self.snapshot
+
+    def is_loading(self):
+        """Return True if there is no data to serve yet"""
+        return self.snapshot is None
+
+    def is_stale(self):
+        """Return True if the most recent attempt to retrieve fresh data failed"""
+        return self.last_error is not None
+
+    def refresh(self):
+        """Retrieve fresh data and replace the current snapshot. If retrieving the data fails, the current snapshot is
+        kept. Returns True if fresh data was retrieved, even if it turned out to be the same as the current data."""
+        # Only one refresh runs at a time; a refresh that is requested while another is running is skipped
+        if not self.refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            try:
+                data = self.loader()
+                version = self.get_version(data) if self.get_version is not None else None
+            except Exception as error:
+                logger.exception('Could not retrieve fresh data, keeping the last-known-good snapshot')
+                self.last_error = error
+                return False
+            self.last_error = None
+
+            # If the data hasn't changed, the current snapshot is kept, along with the time it was retrieved
+            if self.snapshot is not None and self.snapshot.version == version:
+                return True
+
+            # If another process already saved a snapshot of the same data, that snapshot is used instead, so that every
+            # process shows the same retrieval time. Otherwise, the new snapshot is saved for the other processes.
+            snapshot = Snapshot(data, data_format=self.data_format, version=version)
+            saved_snapshot = self.read_from_disk() if version is not None else None
+            if saved_snapshot is not None and saved_snapshot.version == version:
+                snapshot = saved_snapshot
+            else:
+                self.write_to_disk(snapshot)
+            self.snapshot = snapshot
+            return True
+        finally:
+            self.refresh_lock.release()
+
+    def refresh_in_background(self):
+        """Start a refresh on a background thread and return immediately"""
+        thread = threading.Thread(target=self.refresh, name='snapshot-refresh')
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _refresh_periodically(self):
+        """Refresh the data every refresh_interval (or every retry_interval while there is no data yet), forever. Runs
+        on its own background thread."""
+        wait = threading.Event()
+        while True:
+            interval = self.refresh_interval if self.snapshot is not None else self.retry_interval
+            if interval is None:
+                return
+            wait.wait(interval.total_seconds())
+            self.refresh()
+
+    def read_from_disk(self):
+        """Return the snapshot saved at path, or None if there is no usable snapshot saved there"""
+        try:
+            with open(self.path, 'rb') as file:
+                snapshot = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception('Could not read the snapshot saved at %s', self.path)
+            return None
+        if not isinstance(snapshot, Snapshot) or getattr(snapshot, 'data_format', None) != self.data_format:
+            return None
+        return snapshot
+
+    def write_to_disk(self, snapshot):
+        """Save the snapshot at path. The snapshot is written to a temporary file first, so that a crash part way
+        through never leaves a broken snapshot behind."""
+        temporary_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            with open(temporary_path, 'wb') as file:
+                pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self.path)
+        except Exception:
+            logger.exception('Could not save the snapshot at %s', self.path)
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
@@ -0,0 +1,68 @@
+"""---------------------------------------------------------------------------------------------------------------------
+  File Name:   trends.py
+  End Result:  Computes moving averages and growth trends for many geographies and many window sizes at once
+  Outline:     1) moving_averages: Moving averages over several window sizes from a single running total
+               2) compute_trends: Moving averages, week-over-week growth, and doubling time for every geography
+               3) latest_trends: The most recent value of every trend, with one row per geography
+               4) fastest_growing: The geographies with the highest week-over-week growth
+  Created:     October 19, 2026
+---------------------------------------------------------------------------------------------------------------------"""
+
+import numpy as np
+import pandas as pd
+
+
+def moving_averages(values, windows):
+    """Return an array of moving averages with shape (windows, days, geographies) for a 2D array of daily counts with
+    shape (days, geographies). Every window size is computed from the same running total, so the cost doesn't depend on
+    the size of the windows. Days without a full window before them are NaN, just like pandas' rolling().mean()."""
+    values = np.asarray(values, dtype=float)
+    running_total = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+    averages = np.full((len(windows),) + values.shape, np.nan)
+    for i, window in enumerate(windows):
+        averages[i, window - 1:] = (running_total[window:] - running_total[:-window]) / window
+    return averages
+
+
+def compute_trends(daily, windows=(7, 14, 28), growth_window=7):
+    """Compute trends for a dataframe of daily counts (one row per date, one column per geography). Returns a
+    dictionary of dataframes shaped like daily:
+      - 'avg_7', 'avg_14', etc.: Moving average for each window size in windows
+      - 'growth': Week-over-week growth of the growth_window-day moving average (0.25 means 25% higher than a week ago)
+      - 'doubling_time': Days for the growth_window-day moving average to double at the current growth rate (NaN when
+        the moving average isn't growing)"""
+    all_windows = tuple(windows) if growth_window in windows else tuple(windows) + (growth_window,)
+    averages = moving_averages(daily.to_numpy(dtype=float), all_windows)
+
+    # Compare each day's moving average to the moving average one week earlier
+    average = averages[all_windows.index(growth_window)]
+    earlier = np.full_like(average, np.nan)
+    earlier[7:] = average[:-7]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = average / earlier
+        growth = np.where(earlier > 0, ratio - 1, np.nan)
+        doubling_time = np.where((earlier > 0) & (ratio > 1), 7 * np.log(2) / np.log(ratio), np.nan)
+
+    def to_dataframe(array):
+        return pd.DataFrame(array, index=daily.index, columns=daily.columns)
+
+    trends = {'avg_{}'.format(window): to_dataframe(averages[i]) for i, window in enumerate(all_windows)
+              if window in windows}
+    trends['growth'] = to_dataframe(growth)
+    trends['doubling_time'] = to_dataframe(doubling_time)
+    return trends
+
+
+def latest_trends(daily, windows=(7, 14, 28), growth_window=7):
+    """Return a dataframe with the most recent value of every trend from compute_trends(), with one row per geography
+    and one column per trend. This is the table behind summaries like a statewide heat table."""
+    trends = compute_trends(daily, windows, growth_window)
+    return pd.DataFrame({name: trend.iloc[-1] for name, trend in trends.items()})
+
+
+def fastest_growing(daily, n=10, minimum_average=1):
+    """Return the latest trends for the n geographies with the highest week-over-week growth. Geographies whose 7-day
+    average is below minimum_average are left out, since tiny numbers make for huge but meaningless growth rates."""
+    latest = latest_trends(daily)
+    latest = latest[latest['avg_7'] >= minimum_average]
+    return latest.sort_values(by='growth', ascending=False).head(n)